@@ -0,0 +1,867 @@
+import random
+
+
+# Squares are numbered sq = row * 8 + col (row 0 is black's back rank), bit sq of a bitboard is that square
+PIECE_CODES = ["wp", "wN", "wB", "wR", "wQ", "wK", "bp", "bN", "bB", "bR", "bQ", "bK"]
+PIECE_INDEX = {code: index for index, code in enumerate(PIECE_CODES)}
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+WHITE, BLACK = 0, 1
+NO_PIECE = -1
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL_BOARD ^ FILE_A
+NOT_FILE_H = FULL_BOARD ^ FILE_H
+NOT_FILE_AB = NOT_FILE_A & (FULL_BOARD ^ (FILE_A << 1))
+NOT_FILE_GH = NOT_FILE_H & (FULL_BOARD ^ (FILE_A << 6))
+LIGHT_SQUARES = sum(1 << square for square in range(64) if (square // 8 + square % 8) % 2 == 0)
+
+# (shift, mask) for one step in a direction; the mask drops bits that wrapped around a board edge
+ROOK_DIRECTIONS = ((-8, FULL_BOARD), (8, FULL_BOARD), (-1, NOT_FILE_H), (1, NOT_FILE_A))
+BISHOP_DIRECTIONS = ((-9, NOT_FILE_H), (-7, NOT_FILE_A), (7, NOT_FILE_H), (9, NOT_FILE_A))
+
+START_POSITION = [["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"],
+				  ["bp", "bp", "bp", "bp", "bp", "bp", "bp", "bp"],
+				  ["--", "--", "--", "--", "--", "--", "--", "--"],
+				  ["--", "--", "--", "--", "--", "--", "--", "--"],
+				  ["--", "--", "--", "--", "--", "--", "--", "--"],
+				  ["--", "--", "--", "--", "--", "--", "--", "--"],
+				  ["wp", "wp", "wp", "wp", "wp", "wp", "wp", "wp"],
+				  ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]]
+
+
+def shift(bitboard, amount, mask):
+	if amount > 0:
+		return (bitboard << amount) & mask
+	return (bitboard >> -amount) & mask
+
+
+def bitboard_squares(bitboard):
+	while bitboard:
+		low_bit = bitboard & -bitboard
+		yield low_bit.bit_length() - 1
+		bitboard ^= low_bit
+
+
+def knight_attacks(bitboard):
+	return (((bitboard << 17) & NOT_FILE_A) | ((bitboard << 15) & NOT_FILE_H)
+			| ((bitboard << 10) & NOT_FILE_AB) | ((bitboard << 6) & NOT_FILE_GH)
+			| ((bitboard >> 6) & NOT_FILE_AB) | ((bitboard >> 10) & NOT_FILE_GH)
+			| ((bitboard >> 15) & NOT_FILE_A) | ((bitboard >> 17) & NOT_FILE_H))
+
+
+def king_attacks(bitboard):
+	row = bitboard | ((bitboard << 1) & NOT_FILE_A) | ((bitboard >> 1) & NOT_FILE_H)
+	return ((row | (row << 8) | (row >> 8)) ^ bitboard) & FULL_BOARD
+
+
+def pawn_attacks(bitboard, side):
+	if side == WHITE:
+		return ((bitboard >> 7) & NOT_FILE_A) | ((bitboard >> 9) & NOT_FILE_H)
+	return ((bitboard << 9) & NOT_FILE_A) | ((bitboard << 7) & NOT_FILE_H)
+
+
+def sliding_attacks(bitboard, directions, occupied):
+	attacks = 0
+	empty = FULL_BOARD ^ occupied
+	for amount, mask in directions:
+		ray = shift(bitboard, amount, mask)
+		while ray:
+			attacks |= ray
+			ray = shift(ray & empty, amount, mask)
+	return attacks
+
+
+KNIGHT_ATTACKS = tuple(knight_attacks(1 << square) for square in range(64))
+KING_ATTACKS = tuple(king_attacks(1 << square) for square in range(64))
+PAWN_ATTACKS = tuple(tuple(pawn_attacks(1 << square, side) for square in range(64)) for side in (WHITE, BLACK))
+# RAYS[direction][square]: every square from `square` to the board edge in that direction, same order as the direction lists
+RAYS = tuple(tuple(sliding_attacks(1 << square, [direction], 0) for square in range(64))
+			 for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+NORTH_RAYS, SOUTH_RAYS, WEST_RAYS, EAST_RAYS, NORTH_WEST_RAYS, NORTH_EAST_RAYS, SOUTH_WEST_RAYS, SOUTH_EAST_RAYS = RAYS
+
+
+def rook_attacks(square, occupied):
+	# rays growing towards higher squares stop at their lowest blocker, the others at their highest
+	attacks = 0
+	ray = NORTH_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ NORTH_RAYS[blockers.bit_length() - 1] if blockers else ray
+	ray = WEST_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ WEST_RAYS[blockers.bit_length() - 1] if blockers else ray
+	ray = SOUTH_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ SOUTH_RAYS[(blockers & -blockers).bit_length() - 1] if blockers else ray
+	ray = EAST_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ EAST_RAYS[(blockers & -blockers).bit_length() - 1] if blockers else ray
+	return attacks
+
+
+def bishop_attacks(square, occupied):
+	attacks = 0
+	ray = NORTH_WEST_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ NORTH_WEST_RAYS[blockers.bit_length() - 1] if blockers else ray
+	ray = NORTH_EAST_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ NORTH_EAST_RAYS[blockers.bit_length() - 1] if blockers else ray
+	ray = SOUTH_WEST_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ SOUTH_WEST_RAYS[(blockers & -blockers).bit_length() - 1] if blockers else ray
+	ray = SOUTH_EAST_RAYS[square]
+	blockers = ray & occupied
+	attacks |= ray ^ SOUTH_EAST_RAYS[(blockers & -blockers).bit_length() - 1] if blockers else ray
+	return attacks
+
+
+def build_lines():
+	between = [[0] * 64 for _ in range(64)]
+	lines = [[0] * 64 for _ in range(64)]
+	for direction in range(8):
+		# directions come in opposite pairs: north/south, west/east, north-west/south-east... see RAYS
+		opposite = [1, 0, 3, 2, 7, 6, 5, 4][direction]
+		for start in range(64):
+			for end in bitboard_squares(RAYS[direction][start]):
+				between[start][end] = RAYS[direction][start] ^ RAYS[direction][end] ^ (1 << end)
+				lines[start][end] = RAYS[direction][start] | RAYS[opposite][start] | (1 << start)
+	return between, lines
+
+
+# BETWEEN[a][b]: squares strictly between two aligned squares, LINE[a][b]: the whole line through them (0 if not aligned)
+BETWEEN, LINE = build_lines()
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_RIGHTS = (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+
+
+def build_castling(king_homes, rook_homes):
+	# castling tables for kings starting on king_homes (white, black) and castling rooks on rook_homes (in CASTLING_RIGHTS
+	# order). The king always ends on the g or c file and the rook next to it on f or d, which is the Chess960 rule and
+	# the normal one from e1/a1/h1. Returns:
+	# mask: castling rights kept after a move touches a square (king or rook leaving home, rook captured at home)
+	# moves: per side, (right, move, king from, king to, rook from, rook to, squares that must be empty, squares the king crosses)
+	# table: the same entries by move
+	mask = [15] * 64
+	moves = [[], []]
+	table = {}
+	for side, rights in ((WHITE, (WHITE_KINGSIDE, WHITE_QUEENSIDE)), (BLACK, (BLACK_KINGSIDE, BLACK_QUEENSIDE))):
+		king_from = king_homes[side]
+		row = 56 if side == WHITE else 0
+		mask[king_from] &= 15 ^ (rights[0] | rights[1])
+		for right, king_col, rook_col in ((rights[0], 6, 5), (rights[1], 2, 3)):
+			rook_from = rook_homes[CASTLING_RIGHTS.index(right)]
+			king_to, rook_to = row + king_col, row + rook_col
+			mask[rook_from] &= 15 ^ right
+			# from the normal squares the king steps two squares as always, otherwise it is written as taking its own rook
+			if king_from == row + 4 and rook_from in (row, row + 7):
+				move = king_from | (king_to << 6)
+			else:
+				move = king_from | (rook_from << 6)
+			empty = (BETWEEN[king_from][king_to] | (1 << king_to) | BETWEEN[rook_from][rook_to] | (1 << rook_to)) \
+				& ~((1 << king_from) | (1 << rook_from))
+			entry = (right, move, king_from, king_to, rook_from, rook_to, empty, tuple(bitboard_squares(BETWEEN[king_from][king_to])))
+			moves[side].append(entry)
+			table[move] = entry
+	return mask, moves, table
+
+
+CASTLING_MASK, CASTLING_MOVES, CASTLING_TABLE = build_castling((60, 4), (63, 56, 7, 0))
+# (king homes, rook homes) -> build_castling result, shared by every board with the same start squares
+castling_tables = {((60, 4), (63, 56, 7, 0)): (CASTLING_MASK, CASTLING_MOVES, CASTLING_TABLE)}
+
+
+# Zobrist keys come from a fixed seed so that every process (and every saved file) agrees on a position's key
+zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [[zobrist_random.getrandbits(64) for square in range(64)] for piece in range(12)]
+ZOBRIST_CASTLING = [zobrist_random.getrandbits(64) for rights in range(16)]
+ZOBRIST_EN_PASSANT = [zobrist_random.getrandbits(64) for col in range(8)]
+ZOBRIST_SIDE = zobrist_random.getrandbits(64)
+# checks given so far by each side (Three-Check); no checks hashes to 0 so other games keep their keys
+ZOBRIST_CHECKS = [[0] + [zobrist_random.getrandbits(64) for count in range(3)] for side in (WHITE, BLACK)]
+
+# game_result values that end the game in a draw; any other non-empty result is a loss for the side to move
+DRAW_RESULTS = ("stalemate", "threefold repetition", "fifty-move rule", "insufficient material")
+
+
+def encode_move(start, end, promotion=0):
+	# 16 bits: start square, end square, promoted piece type (KNIGHT..QUEEN, 0 for none)
+	return start | (end << 6) | (promotion << 12)
+
+
+def square_name(square):
+	return "abcdefgh"[square % 8] + str(8 - square // 8)
+
+
+def move_to_uci(move):
+	name = square_name(move & 63) + square_name(move >> 6 & 63)
+	if move >> 12:
+		name += "nbrq"[(move >> 12) - KNIGHT]
+	return name
+
+
+class Variant:
+	"""
+	class luật của 1 biến thể cờ: Board hỏi nó khi sinh nước đi và xét kết thúc ván, Engine hỏi khi đánh giá thế cờ,
+	Renderer hỏi khi vẽ bàn cờ; lớp này là cờ vua thường, các biến thể trong variants.py chỉ ghi đè phần luật khác đi
+	biến thể không giữ trạng thái của ván nên mỗi biến thể chỉ có 1 đối tượng dùng chung như PIECES
+	thuộc tính:
+		number: mã của biến thể, cũng là lựa chọn ở menu chính và giá trị variant trong tệp ván cờ
+		name: tên hiện trên menu
+		goal: bitboard các ô mà vua bước tới là thắng ngay (0 nếu không có)
+		check_limit: số lần chiếu để thắng (0 nếu không tính), Board chỉ đếm số lần chiếu khi khác 0
+		material_draws: 2 bên chỉ còn vua hoặc quân nhẹ có bị xử hoà vì thiếu quân không
+		tablebases: bảng tàn cuộc của cờ thường có đúng cho biến thể này không
+		opening_book: sách khai cuộc (dựng từ ván cờ thường, khoá là Board.hash) có dùng được cho biến thể này không
+	phương thức:
+		start_fen: FEN của thế cờ ban đầu, None là thế cờ thường
+		result: lý do bên vừa đi đã thắng theo luật riêng của biến thể, "" nếu chưa; chỉ là phép thử bitboard O(1) nên dùng được trong lúc tìm kiếm
+		evaluate: điểm cộng thêm theo luật riêng (nhìn từ phía trắng) cho hàm đánh giá của máy
+	"""
+	__slots__ = ()
+	number = 1
+	name = "Normal Game"
+	goal = 0
+	check_limit = 0
+	material_draws = True
+	tablebases = True
+	opening_book = True
+
+	def start_fen(self):
+		return None
+
+	def result(self, board):
+		return ""
+
+	def evaluate(self, board):
+		return 0
+
+
+STANDARD = Variant()
+
+
+class Board:
+	"""
+	class mô phỏng bàn cờ và thế cờ hiện tại
+	thuộc tính:
+		bitboards: 12 số nguyên 64 bit, mỗi số ứng với 1 loại quân của 1 màu (theo thứ tự PIECE_CODES)
+		occupancy: 2 bitboard chứa các ô có quân trắng / quân đen
+		squares: mảng 64 ô lưu chỉ số quân cờ trên từng ô (NO_PIECE nếu ô trống)
+		whiteTurn: xác định đang là lượt của trắng hay đen
+		dimension: chiều của bàn cờ
+		variant: luật của biến thể đang chơi (Variant, mặc định STANDARD)
+		checks: số lần trắng / đen đã chiếu (chỉ đếm khi variant.check_limit khác 0)
+		move_cache, target_cache, check_cache, result_cache: kết quả tính cho thế cờ hiện tại (nước đi hợp lệ, bị chiếu, kết thúc ván), chỉ bị xoá khi move_piece hoặc reset
+		en_passant_target: mục tiêu sẽ bắt tốt qua đường  ( nếu có)
+		castling_rights: 4 bit quyền nhập thành còn lại (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+		castling_homes: ô ban đầu của 2 vua và 4 xe nhập thành (khác thế cờ thường trong Chess960)
+		castling_mask, castling_moves, castling_table: các bảng nhập thành của build_castling cho castling_homes, dùng chung giữa các bàn cờ
+		halfmove_clock: số nước đi liên tiếp không có tốt di chuyển hay ăn quân
+		fullmove_number: số thứ tự nước đi đầy đủ, tăng sau mỗi nước của đen (như trong FEN)
+		position_counts: số lần mỗi khoá Zobrist đã xuất hiện trong ván, để phát hiện lặp lại 3 lần
+		history: ngăn xếp các bản ghi hoàn tác (nước đi, quân bị ăn, en_passant_target, castling_rights, halfmove_clock, hash, checks)
+		hash: khoá Zobrist của thế cờ (vị trí quân, bên đi, quyền nhập thành, cột bắt tốt qua đường), cập nhật dần sau mỗi lần đặt / nhấc quân
+	phương thức:
+		reset: đưa bàn cờ về thế cờ ban đầu (của biến thể mới nếu truyền vào)
+		from_fen: tạo bàn cờ từ 1 chuỗi FEN
+		set_fen: dựng lại thế cờ theo 1 chuỗi FEN (vị trí quân, bên đi, quyền nhập thành, ô bắt tốt qua đường, 2 bộ đếm nước)
+		to_fen: chuỗi FEN của thế cờ hiện tại, set_fen(to_fen()) cho lại đúng thế cờ đó
+		set_castling_homes: đặt ô ban đầu của vua và xe nhập thành, lấy (hoặc dựng 1 lần) các bảng nhập thành tương ứng
+		clear_cache: xoá các kết quả đã tính cho thế cờ cũ
+		piece_at: trả về ký hiệu quân cờ ("wp", "bK", ... hoặc "--") tại 1 ô
+		put_piece, remove_piece: đặt / nhấc 1 quân cờ, cập nhật đồng thời bitboard, mảng squares và hash
+		compute_hash: tính lại khoá Zobrist từ đầu (dùng khi dựng thế cờ mới hoặc để kiểm tra)
+		en_passant_key: phần khoá Zobrist của ô bắt tốt qua đường, 0 nếu không có tốt nào của bên đang đi bắt được
+		piece_from_string: trả về đối tượng quân cờ dùng chung (PIECES) ứng với ký hiệu, không tạo đối tượng mới
+		move_piece: thực hiện di chuyển quân cờ (promotion: quân được phong, bắt buộc khi tốt đi tới hàng cuối, thiếu thì báo ValueError)
+		generate_legal_moves: sinh toàn bộ nước đi hợp lệ của bên đang đi, tính quân chiếu và quân bị ghim 1 lần cho cả thế cờ thay vì thử đi từng nước
+		legal_moves: danh sách nước đi hợp lệ của thế cờ hiện tại, chỉ sinh 1 lần cho mỗi thế cờ
+		legal_moves_from: các ô (hàng, cột) mà quân cờ tại 1 ô đi tới được
+		is_valid_move: xác định xem nước đi người chơi muốn đi có nằm trong danh sách nước đi hợp lệ không
+		game_result: lý do thắng của biến thể (variant.result), "checkmate", "stalemate", "threefold repetition", "fifty-move rule", "insufficient material" hoặc "" nếu ván cờ chưa kết thúc
+		repetition_count: số lần thế cờ hiện tại đã xuất hiện trong ván (tra position_counts, O(1))
+		is_insufficient_material: 2 bên đều không đủ quân để chiếu hết
+		is_draw: kiểm tra nhanh các luật hoà (50 nước, lặp lại, thiếu quân) không cần sinh nước đi, dùng trong lúc tìm kiếm
+		make_move: đi 1 nước (đã mã hoá bằng encode_move) và đẩy bản ghi hoàn tác vào history
+		unmake_move: lấy bản ghi cuối của history ra và trả lại đúng thế cờ trước nước đi đó
+		attackers_to: bitboard các quân của 1 bên đang tấn công 1 ô
+		is_square_attacked: kiểm tra 1 ô có bị quân của 1 bên tấn công không
+		is_in_check: kiểm tra xem vua có đang bị chiếu không
+		find_king: xác định vị trí của vua
+
+
+
+	"""
+	def __init__(self, variant=STANDARD):
+		self.dimension = 8
+		self.variant = variant
+		self.reset()
+
+	def reset(self, variant=None):
+		if variant is not None:
+			self.variant = variant
+		fen = self.variant.start_fen()
+		if fen:
+			self.set_fen(fen)
+			return
+		self.bitboards = [0] * 12
+		self.occupancy = [0, 0]
+		self.squares = [NO_PIECE] * 64
+		self.hash = 0
+		for row in range(8):
+			for col in range(8):
+				if START_POSITION[row][col] != "--":
+					self.put_piece(row * 8 + col, PIECE_INDEX[START_POSITION[row][col]])
+		self.whiteTurn = True
+		self.en_passant_target = None
+		self.set_castling_homes(((60, 4), (63, 56, 7, 0)))
+		self.castling_rights = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+		self.halfmove_clock = 0
+		self.fullmove_number = 1
+		self.history = []
+		self.checks = (0, 0)
+		self.hash = self.compute_hash()
+		self.position_counts = {self.hash: 1}
+		self.clear_cache()
+
+	@classmethod
+	def from_fen(cls, fen, variant=STANDARD):
+		board = cls(variant)
+		board.set_fen(fen)
+		return board
+
+	def set_fen(self, fen):
+		# everything is parsed and checked first, so a bad FEN raises ValueError and leaves the board as it was
+		fields = fen.split()
+		if len(fields) < 4:
+			raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+		rows = fields[0].split("/")
+		if len(rows) != 8:
+			raise ValueError(f"FEN needs 8 rows: {fen!r}")
+		squares = []
+		for text in rows:
+			row = []
+			for char in text:
+				if char.isdigit():
+					row.extend([NO_PIECE] * int(char))
+				elif char.lower() in "pnbrqk":
+					row.append(PIECE_INDEX[("w" if char.isupper() else "b") + ("p" if char in "pP" else char.upper())])
+				else:
+					raise ValueError(f"bad FEN row {text!r}")
+			if len(row) != 8:
+				raise ValueError(f"bad FEN row {text!r}")
+			squares.extend(row)
+		if fields[1] not in ("w", "b"):
+			raise ValueError(f"bad side to move {fields[1]!r}")
+		# KQkq is the outermost rook on that side of the king (X-FEN), a file letter names the rook (Shredder-FEN), as
+		# Chess960 needs; a right without its king and rook on the back rank is dropped
+		castling_rights = 0
+		king_homes = [60, 4]
+		rook_homes = [63, 56, 7, 0]
+		for char in fields[2] if fields[2] != "-" else "":
+			if char not in "KQkq" and char.lower() not in "abcdefgh":
+				raise ValueError(f"bad castling rights {fields[2]!r}")
+			side = WHITE if char.isupper() else BLACK
+			row = 56 if side == WHITE else 0
+			rook = side * 6 + ROOK
+			king = next((square for square in range(row, row + 8) if squares[square] == side * 6 + KING), None)
+			if king is None:
+				continue
+			if char in "KQkq":
+				files = range(row + 7, king, -1) if char in "Kk" else range(row, king)
+				home = next((square for square in files if squares[square] == rook), None)
+			else:
+				home = row + "abcdefgh".index(char.lower())
+			if home is None or squares[home] != rook:
+				continue
+			right = CASTLING_RIGHTS[side * 2 + (0 if home > king else 1)]
+			castling_rights |= right
+			king_homes[side] = king
+			rook_homes[CASTLING_RIGHTS.index(right)] = home
+		# the square a pawn of the side not to move just skipped: rank 6 with white to move, rank 3 with black to move,
+		# that pawn right behind it and both the skipped square and the one the pawn came from empty
+		en_passant_target = None
+		if fields[3] != "-":
+			white = fields[1] == "w"
+			if len(fields[3]) != 2 or fields[3][0] not in "abcdefgh" or fields[3][1] != ("6" if white else "3"):
+				raise ValueError(f"bad en passant square {fields[3]!r}")
+			target = (8 - int(fields[3][1])) * 8 + "abcdefgh".index(fields[3][0])
+			forward = 8 if white else -8
+			if (squares[target + forward] != (BLACK * 6 + PAWN if white else PAWN)
+					or squares[target] != NO_PIECE or squares[target - forward] != NO_PIECE):
+				raise ValueError(f"en passant square {fields[3]!r} without a pawn that just moved two squares")
+			en_passant_target = (target // 8, target % 8)
+		try:
+			halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+			fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+		except ValueError:
+			raise ValueError(f"bad move counters in {fen!r}") from None
+
+		self.bitboards = [0] * 12
+		self.occupancy = [0, 0]
+		self.squares = [NO_PIECE] * 64
+		self.hash = 0
+		for square, piece in enumerate(squares):
+			if piece != NO_PIECE:
+				self.put_piece(square, piece)
+		self.whiteTurn = fields[1] == "w"
+		self.set_castling_homes((tuple(king_homes), tuple(rook_homes)))
+		self.castling_rights = castling_rights
+		self.en_passant_target = en_passant_target
+		self.halfmove_clock = halfmove_clock
+		self.fullmove_number = fullmove_number
+		self.history = []
+		self.checks = (0, 0)
+		self.hash = self.compute_hash()
+		self.position_counts = {self.hash: 1}
+		self.clear_cache()
+
+	def to_fen(self):
+		rows = []
+		for row in range(8):
+			text = ""
+			empty = 0
+			for piece in self.squares[row * 8:row * 8 + 8]:
+				if piece == NO_PIECE:
+					empty += 1
+					continue
+				if empty:
+					text += str(empty)
+					empty = 0
+				letter = "PNBRQK"[piece % 6]
+				text += letter if piece < 6 else letter.lower()
+			rows.append(text + (str(empty) if empty else ""))
+		castling = ""
+		for index, (char, right) in enumerate(zip("KQkq", CASTLING_RIGHTS)):
+			if self.castling_rights & right:
+				home = self.castling_homes[1][index]
+				row = home - home % 8
+				# the file letter only when another rook stands further out and KQkq would name that one instead
+				outside = range(home + 1, row + 8) if index % 2 == 0 else range(row, home)
+				if any(self.squares[square] == self.squares[home] for square in outside):
+					char = "ABCDEFGH"[home % 8] if char.isupper() else "abcdefgh"[home % 8]
+				castling += char
+		castling = castling or "-"
+		en_passant = square_name(self.en_passant_target[0] * 8 + self.en_passant_target[1]) if self.en_passant_target else "-"
+		return f"{'/'.join(rows)} {'w' if self.whiteTurn else 'b'} {castling} {en_passant} {self.halfmove_clock} {self.fullmove_number}"
+
+	def set_castling_homes(self, homes):
+		self.castling_homes = homes
+		if homes not in castling_tables:
+			castling_tables[homes] = build_castling(*homes)
+		self.castling_mask, self.castling_moves, self.castling_table = castling_tables[homes]
+
+	def clear_cache(self):
+		self.move_cache = None
+		self.target_cache = None
+		self.check_cache = None
+		self.result_cache = None
+
+	def piece_at(self, pos):
+		piece = self.squares[pos[0] * 8 + pos[1]]
+		return PIECE_CODES[piece] if piece != NO_PIECE else "--"
+
+	def put_piece(self, square, piece):
+		bit = 1 << square
+		self.bitboards[piece] |= bit
+		self.occupancy[piece // 6] |= bit
+		self.squares[square] = piece
+		self.hash ^= ZOBRIST_PIECES[piece][square]
+
+	def remove_piece(self, square):
+		piece = self.squares[square]
+		if piece != NO_PIECE:
+			bit = 1 << square
+			self.bitboards[piece] ^= bit
+			self.occupancy[piece // 6] ^= bit
+			self.squares[square] = NO_PIECE
+			self.hash ^= ZOBRIST_PIECES[piece][square]
+		return piece
+
+	def compute_hash(self):
+		key = 0
+		for square, piece in enumerate(self.squares):
+			if piece != NO_PIECE:
+				key ^= ZOBRIST_PIECES[piece][square]
+		key ^= ZOBRIST_CASTLING[self.castling_rights] ^ self.en_passant_key()
+		if not self.whiteTurn:
+			key ^= ZOBRIST_SIDE
+		key ^= ZOBRIST_CHECKS[WHITE][self.checks[WHITE]] ^ ZOBRIST_CHECKS[BLACK][self.checks[BLACK]]
+		return key
+
+	def en_passant_key(self):
+		# like Polyglot, the en passant file is only part of the key when a pawn of the side to move can take there;
+		# otherwise the position after a double push would never count as a repeat of the same position later on
+		if not self.en_passant_target:
+			return 0
+		us = WHITE if self.whiteTurn else BLACK
+		target = self.en_passant_target[0] * 8 + self.en_passant_target[1]
+		if PAWN_ATTACKS[1 - us][target] & self.bitboards[us * 6 + PAWN]:
+			return ZOBRIST_EN_PASSANT[self.en_passant_target[1]]
+		return 0
+
+	def piece_from_string(self, piece_str):
+		index = PIECE_INDEX.get(piece_str)
+		return PIECES[index] if index is not None else None
+
+	def move_piece(self, start_pos, end_pos, promotion=0):
+		start = start_pos[0] * 8 + start_pos[1]
+		end = end_pos[0] * 8 + end_pos[1]
+		piece = self.squares[start]
+		if not promotion and piece != NO_PIECE and piece % 6 == PAWN and end // 8 in (0, 7):
+			# the choice of piece is the caller's (real_chess.py asks with PromotionMenu), the board never prompts
+			raise ValueError(f"pawn move to row {end // 8} needs a promotion piece")
+		self.make_move(encode_move(start, end, promotion))
+
+	def make_move(self, move):
+		start = move & 63
+		end = move >> 6 & 63
+		piece = self.squares[start]
+		captured = self.squares[end]
+		# with the right still there the king and rook are at home, so this move can only be the castling
+		castle = self.castling_table.get(move) if piece % 6 == KING else None
+		if castle and self.castling_rights & castle[0]:
+			captured = NO_PIECE
+		else:
+			castle = None
+		if piece % 6 == PAWN and captured == NO_PIECE and (end - start) % 8:
+			captured = 6 + PAWN if piece == PAWN else PAWN
+		self.history.append((move, captured, self.en_passant_target, self.castling_rights, self.halfmove_clock, self.hash, self.checks))
+
+		# the piece squares are hashed by put_piece/remove_piece inside the piece's move, the rest is done here
+		key = self.hash ^ ZOBRIST_SIDE ^ ZOBRIST_CASTLING[self.castling_rights] ^ self.en_passant_key()
+		self.en_passant_target = None
+		self.castling_rights &= self.castling_mask[start] & self.castling_mask[end]
+		if piece % 6 == PAWN or captured != NO_PIECE:
+			self.halfmove_clock = 0
+		else:
+			self.halfmove_clock += 1
+		self.hash = key
+		if castle:
+			right, move, king_from, king_to, rook_from, rook_to, empty, crossed = castle
+			# both leave before either lands: in Chess960 the king can end on the rook's square or the other way round
+			self.remove_piece(king_from)
+			self.put_piece(rook_to, self.remove_piece(rook_from))
+			self.put_piece(king_to, piece)
+		else:
+			PIECES[piece].move(start, end, self, move >> 12)
+		if not self.whiteTurn:
+			self.fullmove_number += 1
+		self.whiteTurn = not self.whiteTurn
+		# hashed once the opponent is to move, since only their pawns decide whether the file counts
+		self.hash ^= ZOBRIST_CASTLING[self.castling_rights] ^ self.en_passant_key()
+		self.clear_cache()
+		if self.variant.check_limit and self.is_in_check(self.whiteTurn):
+			# the side that just moved has given one more check
+			mover = BLACK if self.whiteTurn else WHITE
+			count = self.checks[mover]
+			self.hash ^= ZOBRIST_CHECKS[mover][count] ^ ZOBRIST_CHECKS[mover][count + 1]
+			self.checks = (count + 1, self.checks[BLACK]) if mover == WHITE else (self.checks[WHITE], count + 1)
+		self.position_counts[self.hash] = self.position_counts.get(self.hash, 0) + 1
+
+	def unmake_move(self):
+		count = self.position_counts[self.hash] - 1
+		if count:
+			self.position_counts[self.hash] = count
+		else:
+			del self.position_counts[self.hash]
+		move, captured, self.en_passant_target, self.castling_rights, self.halfmove_clock, key, self.checks = self.history.pop()
+		self.whiteTurn = not self.whiteTurn
+		if not self.whiteTurn:
+			self.fullmove_number -= 1
+		start = move & 63
+		end = move >> 6 & 63
+		castle = self.castling_table.get(move)
+		if castle and self.castling_rights & castle[0]:
+			right, move, king_from, king_to, rook_from, rook_to, empty, crossed = castle
+			piece = self.remove_piece(king_to)
+			self.put_piece(rook_from, self.remove_piece(rook_to))
+			self.put_piece(king_from, piece)
+			self.hash = key
+			self.clear_cache()
+			return
+		piece = self.remove_piece(end)
+		if move >> 12:
+			piece = PAWN if self.whiteTurn else 6 + PAWN
+		self.put_piece(start, piece)
+		if captured != NO_PIECE:
+			if piece % 6 == PAWN and self.en_passant_target and end == self.en_passant_target[0] * 8 + self.en_passant_target[1]:
+				self.put_piece(end + 8 if self.whiteTurn else end - 8, captured)
+			else:
+				self.put_piece(end, captured)
+		self.hash = key
+		self.clear_cache()
+
+	def generate_legal_moves(self):
+		us = WHITE if self.whiteTurn else BLACK
+		them = 1 - us
+		bitboards = self.bitboards
+		own = self.occupancy[us]
+		enemy = self.occupancy[them]
+		occupied = own | enemy
+		not_own = FULL_BOARD ^ own
+		king_square = bitboards[us * 6 + KING].bit_length() - 1
+		moves = []
+		# no moves are left once the variant's own rule has ended the game
+		if king_square < 0 or self.variant.result(self):
+			return moves
+
+		# the king steps off its own square, so it must not shelter behind itself on a checking ray
+		without_king = occupied ^ (1 << king_square)
+		for target in bitboard_squares(KING_ATTACKS[king_square] & not_own):
+			if not self.attackers_to(target, them, without_king):
+				moves.append(king_square | (target << 6))
+
+		checkers = self.attackers_to(king_square, them, occupied)
+		if checkers & (checkers - 1):
+			return moves
+		if checkers:
+			target_mask = BETWEEN[king_square][checkers.bit_length() - 1] | checkers
+		else:
+			target_mask = FULL_BOARD
+			for right, move, king_from, king_to, rook_from, rook_to, empty, crossed in self.castling_moves[us]:
+				if self.castling_rights & right and not occupied & empty:
+					if not any(self.attackers_to(square, them, occupied) for square in crossed):
+						# where the king lands is tested with the rook moved, in Chess960 it may have been blocking a slider
+						after = occupied ^ (1 << king_from) ^ (1 << rook_from) | (1 << king_to) | (1 << rook_to)
+						if not self.attackers_to(king_to, them, after):
+							moves.append(move)
+
+		# a piece standing alone between our king and an enemy slider may only move along that line
+		pinned = 0
+		pin_lines = {}
+		snipers = ((rook_attacks(king_square, enemy) & (bitboards[them * 6 + ROOK] | bitboards[them * 6 + QUEEN]))
+				   | (bishop_attacks(king_square, enemy) & (bitboards[them * 6 + BISHOP] | bitboards[them * 6 + QUEEN])))
+		for sniper in bitboard_squares(snipers):
+			blockers = BETWEEN[king_square][sniper] & occupied
+			if blockers & own and not blockers & (blockers - 1):
+				pinned |= blockers
+				pin_lines[blockers.bit_length() - 1] = LINE[king_square][sniper]
+
+		for square in bitboard_squares(bitboards[us * 6 + KNIGHT] & ~pinned):
+			for target in bitboard_squares(KNIGHT_ATTACKS[square] & not_own & target_mask):
+				moves.append(square | (target << 6))
+		for square in bitboard_squares(bitboards[us * 6 + BISHOP] | bitboards[us * 6 + QUEEN]):
+			targets = bishop_attacks(square, occupied) & not_own & target_mask
+			if pinned >> square & 1:
+				targets &= pin_lines[square]
+			for target in bitboard_squares(targets):
+				moves.append(square | (target << 6))
+		for square in bitboard_squares(bitboards[us * 6 + ROOK] | bitboards[us * 6 + QUEEN]):
+			targets = rook_attacks(square, occupied) & not_own & target_mask
+			if pinned >> square & 1:
+				targets &= pin_lines[square]
+			for target in bitboard_squares(targets):
+				moves.append(square | (target << 6))
+
+		forward = -8 if us == WHITE else 8
+		start_row = 6 if us == WHITE else 1
+		en_passant = -1
+		if self.en_passant_target:
+			en_passant = self.en_passant_target[0] * 8 + self.en_passant_target[1]
+		for square in bitboard_squares(bitboards[us * 6 + PAWN]):
+			targets = PAWN_ATTACKS[us][square] & enemy
+			step = square + forward
+			if not occupied >> step & 1:
+				targets |= 1 << step
+				if square // 8 == start_row and not occupied >> (step + forward) & 1:
+					targets |= 1 << (step + forward)
+			targets &= target_mask
+			if pinned >> square & 1:
+				targets &= pin_lines[square]
+			for target in bitboard_squares(targets):
+				if target < 8 or target >= 56:
+					for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+						moves.append(square | (target << 6) | (promotion << 12))
+				else:
+					moves.append(square | (target << 6))
+			if en_passant >= 0 and PAWN_ATTACKS[us][square] >> en_passant & 1:
+				# both pawns leave their squares at once, so test the resulting occupancy directly
+				captured = en_passant - forward
+				after = (occupied ^ (1 << square) ^ (1 << captured)) | (1 << en_passant)
+				if not self.attackers_to(king_square, them, after) & ~(1 << captured):
+					moves.append(square | (en_passant << 6))
+		return moves
+
+	def legal_moves(self):
+		if self.move_cache is None:
+			self.move_cache = self.generate_legal_moves()
+			self.target_cache = {}
+			for move in self.move_cache:
+				self.target_cache.setdefault(move & 63, set()).add(move >> 6 & 63)
+		return self.move_cache
+
+	def legal_moves_from(self, pos):
+		self.legal_moves()
+		return [(end // 8, end % 8) for end in self.target_cache.get(pos[0] * 8 + pos[1], ())]
+
+	def is_valid_move(self, start_pos, end_pos):
+		self.legal_moves()
+		return end_pos[0] * 8 + end_pos[1] in self.target_cache.get(start_pos[0] * 8 + start_pos[1], ())
+
+	def game_result(self):
+		if self.result_cache is None:
+			won = self.variant.result(self)
+			if won:
+				self.result_cache = won
+			elif self.legal_moves():
+				self.result_cache = ""
+			elif self.is_in_check(self.whiteTurn):
+				self.result_cache = "checkmate"
+			else:
+				self.result_cache = "stalemate"
+			if not self.result_cache:
+				if self.repetition_count() >= 3:
+					self.result_cache = "threefold repetition"
+				elif self.halfmove_clock >= 100:
+					self.result_cache = "fifty-move rule"
+				elif self.is_insufficient_material():
+					self.result_cache = "insufficient material"
+		return self.result_cache
+
+	def repetition_count(self):
+		return self.position_counts.get(self.hash, 0)
+
+	def is_insufficient_material(self):
+		if not self.variant.material_draws:
+			return False
+		bitboards = self.bitboards
+		heavy = 0
+		for piece in (PAWN, ROOK, QUEEN):
+			heavy |= bitboards[piece] | bitboards[6 + piece]
+		if heavy:
+			return False
+		knights = bitboards[KNIGHT] | bitboards[6 + KNIGHT]
+		bishops = bitboards[BISHOP] | bitboards[6 + BISHOP]
+		if bin(knights | bishops).count("1") <= 1:
+			return True
+		# any number of bishops that all stand on squares of one colour can never mate
+		return not knights and (bishops & LIGHT_SQUARES == bishops or bishops & LIGHT_SQUARES == 0)
+
+	def is_draw(self, repetitions=3):
+		# the draw rules without generating moves, for use inside a search (which scores a single repetition as a draw)
+		return self.halfmove_clock >= 100 or self.repetition_count() >= repetitions or self.is_insufficient_material()
+
+	def attackers_to(self, square, side, occupied):
+		bitboards = self.bitboards
+		offset = side * 6
+		# a pawn of `side` attacks `square` exactly when a pawn of the other colour on `square` would attack it back
+		return ((KNIGHT_ATTACKS[square] & bitboards[offset + KNIGHT])
+				| (KING_ATTACKS[square] & bitboards[offset + KING])
+				| (PAWN_ATTACKS[1 - side][square] & bitboards[offset + PAWN])
+				| (rook_attacks(square, occupied) & (bitboards[offset + ROOK] | bitboards[offset + QUEEN]))
+				| (bishop_attacks(square, occupied) & (bitboards[offset + BISHOP] | bitboards[offset + QUEEN])))
+
+	def is_square_attacked(self, square, side):
+		bitboards = self.bitboards
+		offset = side * 6
+		if (KNIGHT_ATTACKS[square] & bitboards[offset + KNIGHT] or KING_ATTACKS[square] & bitboards[offset + KING]
+				or PAWN_ATTACKS[1 - side][square] & bitboards[offset + PAWN]):
+			return True
+		occupied = self.occupancy[WHITE] | self.occupancy[BLACK]
+		rooks = bitboards[offset + ROOK] | bitboards[offset + QUEEN]
+		if rooks and rook_attacks(square, occupied) & rooks:
+			return True
+		bishops = bitboards[offset + BISHOP] | bitboards[offset + QUEEN]
+		return bool(bishops and bishop_attacks(square, occupied) & bishops)
+
+	def is_in_check(self, white_turn):
+		if white_turn == self.whiteTurn and self.check_cache is not None:
+			return self.check_cache
+		king = self.bitboards[KING if white_turn else 6 + KING]
+		in_check = bool(king) and self.is_square_attacked(king.bit_length() - 1, BLACK if white_turn else WHITE)
+		if white_turn == self.whiteTurn:
+			self.check_cache = in_check
+		return in_check
+
+	def find_king(self, white_turn):
+		king = self.bitboards[KING if white_turn else 6 + KING]
+		if king:
+			square = king.bit_length() - 1
+			return (square // 8, square % 8)
+		return None
+
+
+
+class Piece:
+	"""
+	class các quân cờ chung:
+	quân cờ không giữ trạng thái gì của ván (vị trí, đã đi chưa... đều nằm trong Board), nên mỗi loại quân của mỗi màu chỉ có
+	1 đối tượng dùng chung trong PIECES; __slots__ giữ cho đối tượng nhỏ và không bị gán thêm thuộc tính
+	nước đi và ô bị tấn công đều do Board.generate_legal_moves tính bằng các bảng dựng sẵn (KNIGHT_ATTACKS, RAYS, ...)
+	thuộc tính :
+		color: màu của quân cờ (Trắng,đen)
+		side: chỉ số màu (WHITE / BLACK) dùng để tra bitboard
+	phương thức:
+		move: nhấc quân ở ô đi, bỏ quân bị ăn (nếu có) ở ô đến rồi đặt quân vào ô đến
+	"""
+	__slots__ = ("color", "side")
+
+	def __init__(self, color):
+		self.color = color
+		self.side = WHITE if color == 'w' else BLACK
+
+	def move(self, start, end, board, promotion=0):
+		piece = board.remove_piece(start)
+		board.remove_piece(end)
+		board.put_piece(end, piece)
+
+
+class Pawn(Piece):
+	"""
+	class của Tốt
+	phương thức:
+		move: di chuyển tốt, bỏ tốt bị bắt qua đường, ghi ô bắt tốt qua đường sau khi đi 2 ô và phong cấp
+	"""
+	__slots__ = ()
+
+	def move(self, start, end, board, promotion=0):
+		if (end - start) % 8 != 0 and board.squares[end] == NO_PIECE:
+			board.remove_piece(end + 8 if self.side == WHITE else end - 8)
+		super().move(start, end, board)
+
+		if abs(end - start) == 16:
+			board.en_passant_target = ((start + end) // 16, end % 8)
+		else:
+			board.en_passant_target = None
+
+		if promotion:
+			board.remove_piece(end)
+			board.put_piece(end, self.side * 6 + promotion)
+
+class Knight(Piece):
+	"""
+	class của mã
+	"""
+	__slots__ = ()
+
+class Bishop(Piece):
+	"""
+	class của tượng
+	"""
+	__slots__ = ()
+
+class Rook(Piece):
+	"""
+	class của xe (quyền nhập thành khi xe chưa đi nằm trong Board.castling_rights)
+	"""
+	__slots__ = ()
+
+class Queen(Piece):
+	"""
+	class của hậu
+	"""
+	__slots__ = ()
+
+class King(Piece):
+	"""
+	class của vua (quyền nhập thành khi vua chưa đi nằm trong Board.castling_rights, nhập thành do Board.make_move thực hiện theo bảng castling_table)
+	"""
+	__slots__ = ()
+
+
+
+# one shared, stateless object per piece index (PIECE_CODES order)
+PIECES = tuple(piece_class(code[0]) for code, piece_class in zip(PIECE_CODES, (Pawn, Knight, Bishop, Rook, Queen, King) * 2))
@@ -0,0 +1,120 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+
+from board import Board, move_to_uci
+from pgn import read_games, replay
+
+
+# Polyglot layout: 16-byte big-endian entries sorted by key. The key is Board.hash and the move is an
+# encode_move value, so a book is tied to this program's Zobrist table rather than to Polyglot's.
+BOOK_ENTRY = struct.Struct(">QHHI")
+BOOK_KEY = struct.Struct(">Q")
+
+
+class OpeningBook:
+	"""
+	class sách khai cuộc đọc qua mmap: các bản ghi (khoá, nước đi, trọng số, learn) được sắp theo khoá nên tra 1 thế cờ
+	chỉ cần tìm nhị phân O(log n) ngay trên tệp, không phải đọc hay phân tích gì lúc mở
+	thuộc tính:
+		data: vùng mmap của tệp sách, None nếu tệp rỗng
+		count: số bản ghi
+		rng: bộ sinh số ngẫu nhiên để chọn nước theo trọng số
+	phương thức:
+		find: vị trí bản ghi đầu tiên có khoá >= key
+		lookup: các (nước đi, trọng số) của 1 khoá
+		pick: chọn ngẫu nhiên theo trọng số 1 nước đi hợp lệ trong sách cho thế cờ, 0 nếu thế cờ không có trong sách
+		close: đóng tệp
+	"""
+	def __init__(self, path, seed=None):
+		self.file = open(path, "rb")
+		# mmap cannot map an empty file, a book built from no games simply has no entries
+		size = os.fstat(self.file.fileno()).st_size
+		self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+		self.count = size // BOOK_ENTRY.size
+		self.rng = random.Random(seed)
+
+	def find(self, key):
+		low, high = 0, self.count
+		while low < high:
+			middle = (low + high) // 2
+			if BOOK_KEY.unpack_from(self.data, middle * BOOK_ENTRY.size)[0] < key:
+				low = middle + 1
+			else:
+				high = middle
+		return low
+
+	def lookup(self, key):
+		entries = []
+		index = self.find(key)
+		while index < self.count:
+			entry_key, move, weight, learn = BOOK_ENTRY.unpack_from(self.data, index * BOOK_ENTRY.size)
+			if entry_key != key:
+				break
+			entries.append((move, weight))
+			index += 1
+		return entries
+
+	def pick(self, board):
+		legal = board.legal_moves()
+		# a hash collision could point at another position's moves, only legal ones are played
+		entries = [(move, weight) for move, weight in self.lookup(board.hash) if move in legal and weight]
+		if not entries:
+			return 0
+		return self.rng.choices([move for move, weight in entries], [weight for move, weight in entries])[0]
+
+	def close(self):
+		if self.data is not None:
+			self.data.close()
+		self.file.close()
+
+
+def build_book(pgn_path, output, max_plies=20, min_games=1):
+	# every (position, move) from the first max_plies plies of each game, weighted like Polyglot books:
+	# 2 points when the side that played it won, 1 for a draw or an unknown result, 0 for a loss;
+	# moves seen in fewer than min_games games are dropped
+	weights = {}
+	counts = {}
+	for tags, movetext in read_games(pgn_path):
+		result = tags.get("Result", "*")
+		board = Board.from_fen(tags["FEN"]) if "FEN" in tags else Board()
+		key = board.hash
+		white = board.whiteTurn
+		try:
+			for ply, move in enumerate(replay(movetext, board)):
+				if ply >= max_plies:
+					break
+				points = 2 if result == ("1-0" if white else "0-1") else 0 if result == ("0-1" if white else "1-0") else 1
+				weights[key, move] = weights.get((key, move), 0) + points
+				counts[key, move] = counts.get((key, move), 0) + 1
+				key = board.hash
+				white = board.whiteTurn
+		except ValueError:
+			# an illegal move ends the game's contribution, the moves before it are still good
+			pass
+	entries = sorted((key, move, min(weight, 0xFFFF)) for (key, move), weight in weights.items()
+					 if counts[key, move] >= min_games)
+	with open(output, "wb") as book:
+		for key, move, weight in entries:
+			book.write(BOOK_ENTRY.pack(key, move, weight, 0))
+	return len(entries)
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Build an opening book from PGN or look up a position in one")
+	parser.add_argument("book", help="book file")
+	parser.add_argument("--build", metavar="PGN", help="compile the book from this PGN file")
+	parser.add_argument("--plies", type=int, default=20, help="with --build, plies of each game to take")
+	parser.add_argument("--min-games", type=int, default=1, help="with --build, drop moves seen in fewer games")
+	parser.add_argument("--fen", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", help="position to look up")
+	args = parser.parse_args()
+
+	if args.build:
+		print(f"entries {build_book(args.build, args.book, args.plies, args.min_games)}")
+	book = OpeningBook(args.book)
+	board = Board.from_fen(args.fen)
+	for move, weight in sorted(book.lookup(board.hash), key=lambda entry: -entry[1]):
+		print(f"{move_to_uci(move)} {weight}")
+	book.close()
@@ -0,0 +1,358 @@
+import argparse
+import time
+
+from board import Board, NO_PIECE, WHITE, BLACK, bitboard_squares, move_to_uci
+from book import OpeningBook
+from tablebase import Tablebase
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from variants import VARIANTS
+
+
+MAX_PLY = 64
+MATE_SCORE = 100000
+INFINITY = 1000000
+PIECE_VALUES = [100, 320, 330, 500, 900, 0]
+
+# piece-square tables from white's point of view, a8 first like Board.squares; black reads them mirrored
+PAWN_TABLE = [
+	0, 0, 0, 0, 0, 0, 0, 0,
+	50, 50, 50, 50, 50, 50, 50, 50,
+	10, 10, 20, 30, 30, 20, 10, 10,
+	5, 5, 10, 25, 25, 10, 5, 5,
+	0, 0, 0, 20, 20, 0, 0, 0,
+	5, -5, -10, 0, 0, -10, -5, 5,
+	5, 10, 10, -20, -20, 10, 10, 5,
+	0, 0, 0, 0, 0, 0, 0, 0]
+KNIGHT_TABLE = [
+	-50, -40, -30, -30, -30, -30, -40, -50,
+	-40, -20, 0, 0, 0, 0, -20, -40,
+	-30, 0, 10, 15, 15, 10, 0, -30,
+	-30, 5, 15, 20, 20, 15, 5, -30,
+	-30, 0, 15, 20, 20, 15, 0, -30,
+	-30, 5, 10, 15, 15, 10, 5, -30,
+	-40, -20, 0, 5, 5, 0, -20, -40,
+	-50, -40, -30, -30, -30, -30, -40, -50]
+BISHOP_TABLE = [
+	-20, -10, -10, -10, -10, -10, -10, -20,
+	-10, 0, 0, 0, 0, 0, 0, -10,
+	-10, 0, 5, 10, 10, 5, 0, -10,
+	-10, 5, 5, 10, 10, 5, 5, -10,
+	-10, 0, 10, 10, 10, 10, 0, -10,
+	-10, 10, 10, 10, 10, 10, 10, -10,
+	-10, 5, 0, 0, 0, 0, 5, -10,
+	-20, -10, -10, -10, -10, -10, -10, -20]
+ROOK_TABLE = [
+	0, 0, 0, 0, 0, 0, 0, 0,
+	5, 10, 10, 10, 10, 10, 10, 5,
+	-5, 0, 0, 0, 0, 0, 0, -5,
+	-5, 0, 0, 0, 0, 0, 0, -5,
+	-5, 0, 0, 0, 0, 0, 0, -5,
+	-5, 0, 0, 0, 0, 0, 0, -5,
+	-5, 0, 0, 0, 0, 0, 0, -5,
+	0, 0, 0, 5, 5, 0, 0, 0]
+QUEEN_TABLE = [
+	-20, -10, -10, -5, -5, -10, -10, -20,
+	-10, 0, 0, 0, 0, 0, 0, -10,
+	-10, 0, 5, 5, 5, 5, 0, -10,
+	-5, 0, 5, 5, 5, 5, 0, -5,
+	0, 0, 5, 5, 5, 5, 0, -5,
+	-10, 5, 5, 5, 5, 5, 0, -10,
+	-10, 0, 5, 0, 0, 0, 0, -10,
+	-20, -10, -10, -5, -5, -10, -10, -20]
+KING_TABLE = [
+	-30, -40, -40, -50, -50, -40, -40, -30,
+	-30, -40, -40, -50, -50, -40, -40, -30,
+	-30, -40, -40, -50, -50, -40, -40, -30,
+	-30, -40, -40, -50, -50, -40, -40, -30,
+	-20, -30, -30, -40, -40, -30, -30, -20,
+	-10, -20, -20, -20, -20, -20, -20, -10,
+	20, 20, 0, 0, 0, 0, 20, 20,
+	20, 30, 10, 0, 0, 10, 30, 20]
+# PIECE_SQUARE[piece][square]: material plus placement, indexed like Board.bitboards
+PIECE_SQUARE = [[PIECE_VALUES[piece_type] + table[square ^ (56 if side == BLACK else 0)] for square in range(64)]
+				for side in (WHITE, BLACK)
+				for piece_type, table in enumerate([PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE])]
+
+# most valuable victim first, then least valuable attacker
+MVV_LVA = [[10 * victim - attacker + 16 for attacker in range(6)] for victim in range(6)]
+CAPTURE_BONUS = 1 << 20
+KILLER_BONUS = 1 << 19
+
+
+def score_to_table(score, ply):
+	# mate scores are stored relative to the position, not to the root the search started from
+	if score >= MATE_SCORE - MAX_PLY:
+		return score + ply
+	if score <= -MATE_SCORE + MAX_PLY:
+		return score - ply
+	return score
+
+
+def score_from_table(score, ply):
+	if score >= MATE_SCORE - MAX_PLY:
+		return score - ply
+	if score <= -MATE_SCORE + MAX_PLY:
+		return score + ply
+	return score
+
+
+class Engine:
+	"""
+	class máy chơi cờ: tìm nước đi bằng negamax cắt tỉa alpha-beta, tìm sâu dần (iterative deepening) cho tới khi hết thời gian
+	thuộc tính:
+		nodes: số thế cờ đã duyệt trong lần tìm gần nhất
+		killers: 2 nước đi im lặng gây cắt tỉa gần nhất ở mỗi độ sâu (ply)
+		history: điểm lịch sử của các nước đi im lặng theo (quân cờ, ô đến)
+		table: bảng chuyển vị dùng chung giữa các lần tìm (dung lượng hash_mb MB, hoặc 1 bảng truyền vào, ví dụ bảng trên bộ nhớ chung)
+		stop_event: cờ dừng từ bên ngoài (có is_set()), ví dụ multiprocessing.Event
+		book: sách khai cuộc (OpeningBook), thế cờ có trong sách thì đi ngay nước trong sách không cần tìm (nếu variant.opening_book)
+		tablebase: bảng tàn cuộc (Tablebase), thế cờ chỉ còn 3 quân được tra bảng thay vì tìm tiếp
+		depth, score: độ sâu đã tìm xong và điểm của nước đi tốt nhất ở lần tìm gần nhất
+		deadline: thời điểm phải dừng tìm kiếm (None nếu chỉ giới hạn độ sâu)
+		stopped: đã hết giờ và đang thoát khỏi cây tìm kiếm
+	phương thức:
+		allot_time: chia thời gian suy nghĩ cho 1 nước từ thời gian còn lại trên đồng hồ
+		search: tìm sâu dần và trả về nước đi tốt nhất
+		search_root, negamax: tìm kiếm alpha-beta ở gốc và ở các nút trong
+		quiescence: chỉ xét các nước ăn quân ở lá để tránh đánh giá sai giữa 1 chuỗi đổi quân
+		order_moves: sắp xếp nước đi (nước tốt nhất trước đó, ăn quân theo MVV-LVA, killer, history)
+		evaluate: đánh giá thế cờ theo vật chất, bảng vị trí và luật riêng của biến thể, nhìn từ phía bên đang đi
+		nodes_per_second: tốc độ duyệt của lần tìm gần nhất
+	"""
+	def __init__(self, hash_mb=16, table=None, stop_event=None, book=None, tablebase=None):
+		self.table = table if table is not None else TranspositionTable(hash_mb)
+		self.stop_event = stop_event
+		self.book = book
+		self.tablebase = tablebase
+		self.depth = 0
+		self.score = 0
+		self.nodes = 0
+		self.killers = [[0, 0] for ply in range(MAX_PLY)]
+		self.history = [[0] * 64 for piece in range(12)]
+		self.deadline = None
+		self.stopped = False
+		self.start_time = 0.0
+		self.elapsed = 0.0
+
+	def allot_time(self, remaining, increment=0):
+		# about a thirtieth of the clock per move, never more than half of what is left
+		return min(remaining / 30 + increment * 0.8, remaining / 2)
+
+	def search(self, board, time_limit=None, max_depth=MAX_PLY, report=None, first_depth=1):
+		self.nodes = 0
+		self.depth = 0
+		self.score = 0
+		self.stopped = False
+		self.start_time = time.perf_counter()
+		self.deadline = self.start_time + time_limit if time_limit else None
+		self.killers = [[0, 0] for ply in range(MAX_PLY)]
+		self.table.new_search()
+		for scores in self.history:
+			for square in range(64):
+				scores[square] >>= 1
+
+		if self.book and board.variant.opening_book:
+			book_move = self.book.pick(board)
+			if book_move:
+				self.elapsed = time.perf_counter() - self.start_time
+				return book_move
+		if self.tablebase and board.variant.tablebases:
+			tablebase_move = self.tablebase.best_move(board)
+			if tablebase_move:
+				self.elapsed = time.perf_counter() - self.start_time
+				return tablebase_move
+
+		moves = board.generate_legal_moves()
+		if not moves:
+			return 0
+		best_move = moves[0]
+		for depth in range(min(first_depth, max_depth), max_depth + 1):
+			score, move = self.search_root(board, moves, depth, best_move)
+			if self.stopped:
+				break
+			best_move = move
+			self.depth = depth
+			self.score = score
+			self.elapsed = time.perf_counter() - self.start_time
+			if report:
+				report(depth, score, self.nodes, self.nodes_per_second(), best_move)
+			if abs(score) >= MATE_SCORE - MAX_PLY:
+				break
+			# the next iteration costs several times this one, do not start what cannot finish
+			if self.deadline and time.perf_counter() + self.elapsed > self.deadline:
+				break
+		self.elapsed = time.perf_counter() - self.start_time
+		return best_move
+
+	def search_root(self, board, moves, depth, best_move):
+		alpha = -INFINITY
+		for move in self.order_moves(board, moves, 0, best_move):
+			board.make_move(move)
+			score = -self.negamax(board, depth - 1, -INFINITY, -alpha, 1)
+			board.unmake_move()
+			if self.stopped:
+				break
+			if score > alpha:
+				alpha = score
+				best_move = move
+		return alpha, best_move
+
+	def negamax(self, board, depth, alpha, beta, ply):
+		# the opponent's last move won by the variant's own rule (a king on the hill, a third check)
+		if board.variant.result(board):
+			return -MATE_SCORE + ply
+		in_check = board.is_in_check(board.whiteTurn)
+		if in_check:
+			depth += 1
+		if depth <= 0 or ply >= MAX_PLY:
+			return self.quiescence(board, alpha, beta, ply)
+		self.nodes += 1
+		if board.is_draw(2):
+			return 0
+		if self.tablebase and board.variant.tablebases:
+			result = self.tablebase.probe(board)
+			if result is not None:
+				wdl, distance = result
+				# a tablebase win ranks like a mate that far away, so the search heads for the fastest one
+				return wdl * (MATE_SCORE - ply - distance)
+		if self.nodes & 1023 == 0:
+			self.check_time()
+
+		key = board.hash
+		table_move = 0
+		entry = self.table.probe(key)
+		if entry:
+			table_move, table_depth, bound, table_score = entry
+			if table_depth >= depth:
+				table_score = score_from_table(table_score, ply)
+				if bound == EXACT or (bound == LOWER_BOUND and table_score >= beta) \
+						or (bound == UPPER_BOUND and table_score <= alpha):
+					return table_score
+
+		moves = board.generate_legal_moves()
+		if not moves:
+			return -MATE_SCORE + ply if in_check else 0
+
+		original_alpha = alpha
+		best = -INFINITY
+		best_move = 0
+		for move in self.order_moves(board, moves, ply, table_move):
+			# a Chess960 castling lands the king on its own rook, only enemy pieces are captures
+			quiet = not board.occupancy[BLACK if board.whiteTurn else WHITE] >> (move >> 6 & 63) & 1 and not move >> 12
+			board.make_move(move)
+			score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+			board.unmake_move()
+			if self.stopped:
+				return 0
+			if score > best:
+				best = score
+				if score > alpha:
+					alpha = score
+					best_move = move
+					if score >= beta:
+						if quiet:
+							killers = self.killers[ply]
+							if killers[0] != move:
+								killers[1] = killers[0]
+								killers[0] = move
+							self.history[board.squares[move & 63]][move >> 6 & 63] += depth * depth
+						break
+
+		if best >= beta:
+			bound = LOWER_BOUND
+		elif best > original_alpha:
+			bound = EXACT
+		else:
+			bound = UPPER_BOUND
+		self.table.store(key, depth, bound, score_to_table(best, ply), best_move)
+		return best
+
+	def quiescence(self, board, alpha, beta, ply):
+		if board.variant.result(board):
+			return -MATE_SCORE + ply
+		self.nodes += 1
+		if self.nodes & 1023 == 0:
+			self.check_time()
+		stand_pat = self.evaluate(board)
+		if stand_pat >= beta or ply >= MAX_PLY:
+			return stand_pat
+		if stand_pat > alpha:
+			alpha = stand_pat
+
+		enemy = board.occupancy[BLACK if board.whiteTurn else WHITE]
+		captures = [move for move in board.generate_legal_moves() if enemy >> (move >> 6 & 63) & 1 or move >> 12]
+		for move in self.order_moves(board, captures, ply, 0):
+			board.make_move(move)
+			score = -self.quiescence(board, -beta, -alpha, ply + 1)
+			board.unmake_move()
+			if self.stopped:
+				return 0
+			if score >= beta:
+				return score
+			if score > alpha:
+				alpha = score
+		return alpha
+
+	def order_moves(self, board, moves, ply, first_move):
+		squares = board.squares
+		killers = self.killers[ply] if ply < MAX_PLY else (0, 0)
+		history = self.history
+
+		def move_score(move):
+			if move == first_move:
+				return INFINITY
+			victim = squares[move >> 6 & 63]
+			attacker = squares[move & 63]
+			if victim != NO_PIECE and victim // 6 != attacker // 6:
+				return CAPTURE_BONUS + MVV_LVA[victim % 6][attacker % 6]
+			if move >> 12:
+				return CAPTURE_BONUS + (move >> 12)
+			if move == killers[0] or move == killers[1]:
+				return KILLER_BONUS
+			return history[attacker][move >> 6 & 63]
+
+		return sorted(moves, key=move_score, reverse=True)
+
+	def evaluate(self, board):
+		score = 0
+		for piece in range(12):
+			table = PIECE_SQUARE[piece]
+			total = 0
+			for square in bitboard_squares(board.bitboards[piece]):
+				total += table[square]
+			score += total if piece < 6 else -total
+		score += board.variant.evaluate(board)
+		return score if board.whiteTurn else -score
+
+	def check_time(self):
+		if self.deadline and time.perf_counter() >= self.deadline:
+			self.stopped = True
+		elif self.stop_event is not None and self.stop_event.is_set():
+			self.stopped = True
+
+	def nodes_per_second(self):
+		elapsed = self.elapsed or time.perf_counter() - self.start_time
+		return int(self.nodes / elapsed) if elapsed > 0 else 0
+
+
+def print_report(depth, score, nodes, nps, move):
+	print(f"depth {depth} score {score} nodes {nodes} nps {nps} best {move_to_uci(move)}")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Run the engine headless from the starting position")
+	parser.add_argument("--time", type=float, default=5.0, help="seconds to think")
+	parser.add_argument("--depth", type=int, default=MAX_PLY, help="maximum search depth")
+	parser.add_argument("--hash", type=int, default=16, help="transposition table size in MB")
+	parser.add_argument("--book", help="opening book file (see book.py)")
+	parser.add_argument("--tablebase", help="directory of endgame tables (see tablebase.py)")
+	parser.add_argument("--fen", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", help="position to search")
+	parser.add_argument("--variant", type=int, choices=sorted(VARIANTS), default=1, help="1 normal, 2 King of the Hill, 4 Three-Check, 5 Chess960")
+	args = parser.parse_args()
+
+	engine = Engine(args.hash, book=OpeningBook(args.book) if args.book else None,
+					tablebase=Tablebase(args.tablebase) if args.tablebase else None)
+	best = engine.search(Board.from_fen(args.fen, VARIANTS[args.variant]), args.time, args.depth, print_report)
+	print(f"bestmove {move_to_uci(best)} nodes {engine.nodes} nps {engine.nodes_per_second()}")
+	table = engine.table
+	print(f"hash hits {table.hits} misses {table.misses} collisions {table.collisions} hit rate {table.hit_rate():.1%}")
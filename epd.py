@@ -0,0 +1,58 @@
+import argparse
+import re
+import time
+
+from board import Board
+
+
+# one "opcode operand operand ...;" group, operands may be quoted strings containing spaces or semicolons
+EPD_OPERATION = re.compile(r'\s*([A-Za-z][\w+#=:-]*)((?:\s+(?:"[^"]*"|[^;\s"]+))*)\s*;')
+EPD_OPERAND = re.compile(r'"([^"]*)"|([^\s"]+)')
+
+
+def parse_epd(line):
+	# returns (fen, operations): the 4 position fields completed with the move clocks from the hmvc/fmvn
+	# opcodes (0 and 1 when absent), and a dict from opcode to its list of operands
+	fields = line.split(None, 4)
+	if len(fields) < 4:
+		raise ValueError(f"EPD needs at least 4 fields: {line!r}")
+	operations = {}
+	if len(fields) == 5:
+		for match in EPD_OPERATION.finditer(fields[4]):
+			operations[match.group(1)] = [quoted or plain for quoted, plain in EPD_OPERAND.findall(match.group(2))]
+	halfmove = operations.get("hmvc", ["0"])[0]
+	fullmove = operations.get("fmvn", ["1"])[0]
+	return " ".join(fields[:4] + [halfmove, fullmove]), operations
+
+
+def read_epd(path):
+	# generator over the positions of an EPD file, one line at a time so the file is never loaded whole
+	with open(path) as lines:
+		for line in lines:
+			line = line.strip()
+			if line and not line.startswith("#"):
+				yield parse_epd(line)
+
+
+def read_boards(path):
+	# same as read_epd but with the position set up; the one Board is reused for every line, copy it to keep it
+	board = Board()
+	for fen, operations in read_epd(path):
+		board.set_fen(fen)
+		yield board, operations
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Load every position of an EPD file and report the loading speed")
+	parser.add_argument("path", help="EPD file")
+	parser.add_argument("--check", action="store_true", help="also check that to_fen gives back each position")
+	args = parser.parse_args()
+
+	count = 0
+	start = time.perf_counter()
+	for board, operations in read_boards(args.path):
+		count += 1
+		if args.check and Board.from_fen(board.to_fen()).to_fen() != board.to_fen():
+			print(f"round trip failed: {board.to_fen()}")
+	elapsed = time.perf_counter() - start
+	print(f"positions {count} time {elapsed:.2f}s positions/s {int(count / elapsed) if elapsed > 0 else 0}")
@@ -0,0 +1,163 @@
+import argparse
+import copy
+import mmap
+import os
+import struct
+from array import array
+
+from board import Board, STANDARD, move_to_uci
+from variants import VARIANTS, CHESS960, chess960_fen, chess960_index
+
+
+UNFINISHED, WHITE_WINS, BLACK_WINS, DRAW = 0, 1, 2, 3
+RESULT_NAMES = ["*", "1-0", "0-1", "1/2-1/2"]
+# per game: number of plies, variant (the main menu choice), result, then the starting clock and both
+# remaining clocks in milliseconds; the moves follow as little-endian 16-bit encode_move values
+RECORD_HEADER = struct.Struct("<HBBIII")
+# a Chess960 game has one more 16-bit value between its header and its moves: the start position number (chess960_fen)
+START_INDEX = struct.Struct("<H")
+INDEX_ENTRY = struct.Struct("<Q")
+
+
+def index_path(path):
+	return path + ".idx"
+
+
+class GameRecorder:
+	"""
+	class ghi các ván cờ vào 1 tệp nhị phân gọn: mỗi ván là 1 header RECORD_HEADER và các nước đi 16 bit,
+	vị trí bắt đầu của từng ván được ghi thêm vào tệp chỉ mục (path + ".idx") để đọc lại không cần quét tệp
+	thuộc tính:
+		path: đường dẫn tệp ván cờ
+	phương thức:
+		write: ghi nối 1 ván vào cuối tệp
+		write_board: ghi ván đang diễn ra trên 1 Board (lấy các nước đi từ history, thế cờ ban đầu Chess960 bằng cách đi lùi hết)
+	"""
+	def __init__(self, path):
+		self.path = path
+
+	def write(self, moves, variant, result, white_time, black_time, time_control=600, start=None):
+		data = RECORD_HEADER.pack(len(moves), variant, result, round(time_control * 1000),
+								  max(0, round(white_time * 1000)), max(0, round(black_time * 1000)))
+		if variant == CHESS960.number:
+			if start is None:
+				raise ValueError("a Chess960 game needs the number of its start position")
+			data += START_INDEX.pack(start)
+		data += struct.pack(f"<{len(moves)}H", *moves)
+		with open(self.path, "ab") as games:
+			offset = games.tell()
+			games.write(data)
+		with open(index_path(self.path), "ab") as index:
+			index.write(INDEX_ENTRY.pack(offset))
+
+	def write_board(self, board, variant, result, white_time, black_time, time_control=600):
+		start = None
+		if variant == CHESS960.number:
+			# take back every move on a copy to see which start position the game began from
+			first = copy.deepcopy(board)
+			while first.history:
+				first.unmake_move()
+			start = chess960_index(first.to_fen())
+		self.write([record[0] for record in board.history], variant, result, white_time, black_time, time_control, start)
+
+
+class GameStore:
+	"""
+	class đọc tệp ván cờ của GameRecorder qua mmap: nhảy thẳng tới ván thứ n, nước thứ k mà không phân tích
+	hay sao chép dữ liệu (các nước đi trả về là memoryview nằm trên chính vùng mmap)
+	thuộc tính:
+		data: vùng mmap của tệp ván cờ, None nếu tệp rỗng
+		offsets: vị trí bắt đầu của từng ván (mmap của tệp chỉ mục, hoặc dựng lại bằng cách nhảy qua các header)
+	phương thức:
+		header: (số nước, biến thể, kết quả, đồng hồ ban đầu, đồng hồ trắng, đồng hồ đen) của ván n, đồng hồ tính bằng mili giây
+		start_fen: FEN thế cờ ban đầu của ván n nếu là Chess960, None nếu bắt đầu như cờ thường
+		moves: các nước đi của ván n
+		move: nước thứ ply của ván n
+		board_at: Board của ván n sau ply nước đầu
+		close: đóng các vùng mmap
+	"""
+	def __init__(self, path):
+		self.games = open(path, "rb")
+		self.index = None
+		if not os.fstat(self.games.fileno()).st_size:
+			# mmap cannot map an empty file, which is just a store with no games yet
+			self.data = None
+			self.offsets = array("Q")
+			return
+		self.data = mmap.mmap(self.games.fileno(), 0, access=mmap.ACCESS_READ)
+		size = os.path.getsize(index_path(path)) if os.path.exists(index_path(path)) else 0
+		if size:
+			self.index_file = open(index_path(path), "rb")
+			self.index = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+			self.offsets = memoryview(self.index).cast("Q")
+		else:
+			# no index next to the file: walk the headers once, each one says how far to jump to the next game
+			self.offsets = array("Q")
+			offset = 0
+			while offset < len(self.data):
+				self.offsets.append(offset)
+				plies, variant = RECORD_HEADER.unpack_from(self.data, offset)[:2]
+				offset += RECORD_HEADER.size + (START_INDEX.size if variant == CHESS960.number else 0) + 2 * plies
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def header(self, game):
+		return RECORD_HEADER.unpack_from(self.data, self.offsets[game])
+
+	def start_fen(self, game):
+		variant = self.header(game)[1]
+		if variant == CHESS960.number:
+			return chess960_fen(START_INDEX.unpack_from(self.data, self.offsets[game] + RECORD_HEADER.size)[0])
+		return None
+
+	def moves_offset(self, game):
+		# where the moves of game begin, past the header and the Chess960 start position number
+		variant = self.header(game)[1]
+		return self.offsets[game] + RECORD_HEADER.size + (START_INDEX.size if variant == CHESS960.number else 0)
+
+	def moves(self, game):
+		start = self.moves_offset(game)
+		plies = RECORD_HEADER.unpack_from(self.data, self.offsets[game])[0]
+		# cast uses the native byte order, which is little-endian on every machine we run on
+		return memoryview(self.data)[start:start + 2 * plies].cast("H")
+
+	def move(self, game, ply):
+		return struct.unpack_from("<H", self.data, self.moves_offset(game) + 2 * ply)[0]
+
+	def board_at(self, game, ply=None):
+		board = Board(VARIANTS.get(self.header(game)[1], STANDARD))
+		fen = self.start_fen(game)
+		if fen:
+			board.set_fen(fen)
+		for move in self.moves(game)[:ply]:
+			board.make_move(move)
+		return board
+
+	def close(self):
+		if self.index is not None:
+			self.offsets.release()
+			self.index.close()
+			self.index_file.close()
+		if self.data is not None:
+			self.data.close()
+		self.games.close()
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="List the games of a binary game record file or show one position")
+	parser.add_argument("path", help="game record file")
+	parser.add_argument("--game", type=int, help="show this game")
+	parser.add_argument("--ply", type=int, help="with --game, show the position after this many plies")
+	args = parser.parse_args()
+
+	store = GameStore(args.path)
+	if args.game is None:
+		print(f"games {len(store)}")
+		for game in range(len(store)):
+			plies, variant, result, time_control, white_time, black_time = store.header(game)
+			print(f"{game}: plies {plies} variant {variant} result {RESULT_NAMES[result]} clocks {white_time / 1000:.1f}s {black_time / 1000:.1f}s of {time_control / 1000:.0f}s")
+	else:
+		print(" ".join(move_to_uci(move) for move in store.moves(args.game)))
+		print(store.board_at(args.game, args.ply).to_fen())
+	store.close()
@@ -0,0 +1,111 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import Engine, MAX_PLY
+from board import Board, move_to_uci
+from transposition import TranspositionTable, table_words
+
+
+worker_engine = None
+
+
+def attach_worker(shared_table, hash_mb, stop_event):
+	# runs once in every pool process: all helpers probe and store into the same shared table
+	global worker_engine
+	worker_engine = Engine(table=TranspositionTable(hash_mb, shared_table), stop_event=stop_event)
+
+
+def search_worker(board, time_limit, max_depth, helper):
+	# odd helpers start one ply deeper so the workers do not all walk the tree in lockstep
+	table = worker_engine.table
+	before = (table.hits, table.misses, table.collisions, table.stores)
+	move = worker_engine.search(board, time_limit, max_depth, first_depth=1 + helper % 2)
+	# the table counters live in this process, so what this search added to them goes back with the result
+	counters = tuple(after - start for after, start in zip((table.hits, table.misses, table.collisions, table.stores), before))
+	return move, worker_engine.depth, worker_engine.score, worker_engine.nodes, helper, counters
+
+
+class ParallelSearch:
+	"""
+	class tìm kiếm song song kiểu Lazy SMP: mỗi tiến trình trong pool cùng tìm từ thế cờ gốc,
+	chia sẻ 1 bảng chuyển vị trên bộ nhớ chung nên kết quả của tiến trình này giúp cắt tỉa cho tiến trình khác
+	thuộc tính:
+		workers: số tiến trình tìm kiếm
+		shared_table: vùng nhớ chung chứa bảng chuyển vị
+		table: bảng chuyển vị của tiến trình chính nhìn vào vùng nhớ chung, bộ đếm thống kê là tổng bộ đếm của các tiến trình tìm kiếm
+		stop_event: cờ báo tất cả tiến trình dừng tìm
+		pool: ProcessPoolExecutor chạy các tiến trình tìm kiếm
+		nodes, elapsed, depth, score: tổng số thế cờ đã duyệt, thời gian, độ sâu và điểm của lần tìm gần nhất
+	phương thức:
+		search: chạy tìm kiếm trên tất cả tiến trình và trả về nước đi của tiến trình tìm sâu nhất
+		stop: yêu cầu các tiến trình dừng sớm
+		nodes_per_second: tốc độ duyệt tổng cộng của lần tìm gần nhất
+		close: tắt pool
+	"""
+	def __init__(self, workers=None, hash_mb=64):
+		self.workers = workers or os.cpu_count() or 1
+		self.shared_table = multiprocessing.RawArray("Q", table_words(hash_mb))
+		self.table = TranspositionTable(hash_mb, self.shared_table)
+		self.stop_event = multiprocessing.Event()
+		self.pool = ProcessPoolExecutor(self.workers, initializer=attach_worker,
+										initargs=(self.shared_table, hash_mb, self.stop_event))
+		self.nodes = 0
+		self.elapsed = 0.0
+		self.depth = 0
+		self.score = 0
+
+	def search(self, board, time_limit=None, max_depth=MAX_PLY):
+		self.stop_event.clear()
+		start = time.perf_counter()
+		futures = [self.pool.submit(search_worker, board, time_limit, max_depth, helper) for helper in range(self.workers)]
+		# once the main worker is done the helpers have nothing left to contribute
+		futures[0].result()
+		self.stop_event.set()
+		results = [future.result() for future in futures]
+		self.elapsed = time.perf_counter() - start
+		self.nodes = sum(result[3] for result in results)
+		for result in results:
+			hits, misses, collisions, stores = result[5]
+			self.table.hits += hits
+			self.table.misses += misses
+			self.table.collisions += collisions
+			self.table.stores += stores
+		move, self.depth, self.score, nodes, helper, counters = max(results, key=lambda result: (result[1], -result[4]))
+		return move
+
+	def stop(self):
+		self.stop_event.set()
+
+	def nodes_per_second(self):
+		return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+	def close(self):
+		self.stop_event.set()
+		self.pool.shutdown()
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Compare single-process and Lazy SMP search speed from the starting position")
+	parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of search processes")
+	parser.add_argument("--time", type=float, default=5.0, help="seconds to think")
+	parser.add_argument("--hash", type=int, default=64, help="shared transposition table size in MB")
+	args = parser.parse_args()
+
+	board = Board()
+	single = Engine(args.hash)
+	move = single.search(board, args.time)
+	print(f"1 worker: bestmove {move_to_uci(move)} depth {single.depth} nodes {single.nodes} nps {single.nodes_per_second()}")
+
+	parallel = ParallelSearch(args.workers, args.hash)
+	try:
+		move = parallel.search(board, args.time)
+		nps = parallel.nodes_per_second()
+		print(f"{parallel.workers} workers: bestmove {move_to_uci(move)} depth {parallel.depth} nodes {parallel.nodes} nps {nps}"
+			  f" speedup {nps / max(single.nodes_per_second(), 1):.2f}x")
+		table = parallel.table
+		print(f"hash hits {table.hits} misses {table.misses} collisions {table.collisions} hit rate {table.hit_rate():.1%}")
+	finally:
+		parallel.close()
@@ -0,0 +1,86 @@
+import argparse
+import sys
+import time
+
+from board import Board, move_to_uci
+
+
+# standard perft positions with their known node counts for depth 1, 2, 3...
+POSITIONS = [
+	("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+	 [20, 400, 8902, 197281, 4865609]),
+	("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+	 [48, 2039, 97862, 4085603]),
+	("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+	 [14, 191, 2812, 43238, 674624]),
+	("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+	 [6, 264, 9467, 422333]),
+	("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+	 [44, 1486, 62379, 2103487]),
+	("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+	 [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, depth):
+	# number of leaf positions depth plies below the current one (the last ply is counted, not played)
+	moves = board.generate_legal_moves()
+	if depth <= 1:
+		return len(moves) if depth == 1 else 1
+	nodes = 0
+	for move in moves:
+		board.make_move(move)
+		nodes += perft(board, depth - 1)
+		board.unmake_move()
+	return nodes
+
+
+def divide(board, depth):
+	# perft split by root move, to find which move a wrong count comes from
+	counts = []
+	for move in board.generate_legal_moves():
+		board.make_move(move)
+		counts.append((move, perft(board, depth - 1)))
+		board.unmake_move()
+	return counts
+
+
+def run(name, board, depth, expected=None, show_divide=False):
+	start = time.perf_counter()
+	if show_divide:
+		counts = divide(board, depth)
+		for move, nodes in counts:
+			print(f"  {move_to_uci(move)}: {nodes}")
+		nodes = sum(nodes for move, nodes in counts)
+	else:
+		nodes = perft(board, depth)
+	elapsed = time.perf_counter() - start
+	nps = int(nodes / elapsed) if elapsed > 0 else 0
+	status = "" if expected is None else " OK" if nodes == expected else f" FAIL expected {expected}"
+	print(f"{name} depth {depth} nodes {nodes} time {elapsed:.2f}s nps {nps}{status}")
+	return expected is None or nodes == expected
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Count move generator leaf nodes (perft) on standard positions")
+	parser.add_argument("--depth", type=int, default=3, help="perft depth (capped at the deepest known count for each position)")
+	parser.add_argument("--position", choices=[name for name, fen, counts in POSITIONS], help="run only this position")
+	parser.add_argument("--fen", help="run a custom position instead of the suite")
+	parser.add_argument("--divide", action="store_true", help="print the node count under every root move")
+	args = parser.parse_args()
+
+	if args.fen:
+		passed = run("fen", Board.from_fen(args.fen), args.depth, show_divide=args.divide)
+	else:
+		passed = True
+		total_nodes = 0
+		start = time.perf_counter()
+		for name, fen, counts in POSITIONS:
+			if args.position and name != args.position:
+				continue
+			depth = min(args.depth, len(counts))
+			passed = run(name, Board.from_fen(fen), depth, counts[depth - 1], args.divide) and passed
+			total_nodes += counts[depth - 1]
+		elapsed = time.perf_counter() - start
+		print(f"total nodes {total_nodes} time {elapsed:.2f}s nps {int(total_nodes / elapsed) if elapsed > 0 else 0}")
+	sys.exit(0 if passed else 1)
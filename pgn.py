@@ -0,0 +1,165 @@
+import argparse
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from board import (Board, PAWN, KNIGHT, KING, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE,
+				   BLACK_QUEENSIDE)
+
+
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+# comments, variations, NAGs, move numbers and results are matched so they can be skipped, everything else is a SAN move
+MOVETEXT_TOKEN = re.compile(r"\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s(){};$]+")
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+def read_games(path):
+	# generator over the games of a PGN file as (tags, movetext), reading one line at a time
+	tags = {}
+	movetext = []
+	with open(path, encoding="utf-8", errors="replace") as lines:
+		for line in lines:
+			line = line.strip()
+			match = TAG_PATTERN.match(line)
+			if match:
+				# a tag after some movetext starts the next game
+				if movetext:
+					yield tags, " ".join(movetext)
+					tags = {}
+					movetext = []
+				tags[match.group(1)] = match.group(2)
+			elif line and not line.startswith("%"):
+				movetext.append(line)
+	if tags or movetext:
+		yield tags, " ".join(movetext)
+
+
+def san_tokens(movetext):
+	# the SAN moves of the main line, without comments, variations, NAGs, move numbers or the result
+	depth = 0
+	for token in MOVETEXT_TOKEN.findall(movetext):
+		if token == "(":
+			depth += 1
+		elif token == ")":
+			depth -= 1
+		# move numbers are digits and dots only, "0-0" and "0-0-0" castle
+		elif depth == 0 and token[0] not in "{;$" and token not in RESULTS and not token.rstrip(".").isdigit():
+			yield token
+
+
+def parse_square(name):
+	return (8 - int(name[1])) * 8 + "abcdefgh".index(name[0])
+
+
+def san_to_move(board, san):
+	# finds the legal move (encoded with encode_move) that a SAN string names in the current position
+	text = san.rstrip("+#!?")
+	moves = board.generate_legal_moves()
+	if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+		side = WHITE_KINGSIDE | BLACK_KINGSIDE if len(text) == 3 else WHITE_QUEENSIDE | BLACK_QUEENSIDE
+		candidates = []
+		for move in moves:
+			# in Chess960 the castling is not a two-square king step, the board's castling table knows it
+			castle = board.castling_table.get(move) if board.squares[move & 63] % 6 == KING else None
+			if castle and castle[0] & side & board.castling_rights:
+				candidates.append(move)
+	else:
+		match = SAN_PATTERN.match(text)
+		if not match:
+			raise ValueError(f"bad SAN move {san!r}")
+		letter, from_file, from_rank, target, promotion = match.groups()
+		piece = "PNBRQK".index(letter) if letter else PAWN
+		end = parse_square(target)
+		promotion = KNIGHT + "NBRQ".index(promotion) if promotion else 0
+		candidates = []
+		for move in moves:
+			start = move & 63
+			if (move >> 6 & 63) != end or board.squares[start] % 6 != piece or move >> 12 != promotion:
+				continue
+			if from_file and "abcdefgh"[start % 8] != from_file:
+				continue
+			if from_rank and str(8 - start // 8) != from_rank:
+				continue
+			candidates.append(move)
+	if len(candidates) != 1:
+		raise ValueError(f"{'ambiguous' if candidates else 'illegal'} SAN move {san!r} in {board.to_fen()}")
+	return candidates[0]
+
+
+def replay(movetext, board=None):
+	# plays the main line on board (a new Board at the start position if None) and yields every move
+	# just after it is made, so the caller sees the position after each move
+	board = board or Board()
+	for san in san_tokens(movetext):
+		move = san_to_move(board, san)
+		board.make_move(move)
+		yield move
+
+
+def replay_game(game):
+	# (plies, result, error) for one (tags, movetext) game; error is None when every move was legal
+	tags, movetext = game
+	board = Board.from_fen(tags["FEN"]) if "FEN" in tags else Board()
+	plies = 0
+	try:
+		for move in replay(movetext, board):
+			plies += 1
+	except ValueError as error:
+		return plies, tags.get("Result", "*"), str(error)
+	return plies, tags.get("Result", "*"), None
+
+
+def replay_batch(games):
+	return [replay_game(game) for game in games]
+
+
+def batches(games, size):
+	batch = []
+	for game in games:
+		batch.append(game)
+		if len(batch) == size:
+			yield batch
+			batch = []
+	if batch:
+		yield batch
+
+
+def replay_archive(path, workers=None, batch_size=64):
+	# replays every game of a PGN file across a process pool and yields the replay_game results in file order;
+	# only a couple of batches per worker are in flight, so memory does not grow with the size of the file
+	workers = workers or os.cpu_count() or 1
+	with ProcessPoolExecutor(workers) as pool:
+		pending = deque()
+		for batch in batches(read_games(path), batch_size):
+			pending.append(pool.submit(replay_batch, batch))
+			if len(pending) >= 2 * workers:
+				yield from pending.popleft().result()
+		while pending:
+			yield from pending.popleft().result()
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Replay and validate every game of a PGN file")
+	parser.add_argument("path", help="PGN file")
+	parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of replay processes")
+	parser.add_argument("--batch", type=int, default=64, help="games sent to a process at a time")
+	args = parser.parse_args()
+
+	games = 0
+	plies = 0
+	errors = 0
+	results = {}
+	start = time.perf_counter()
+	for game_plies, result, error in replay_archive(args.path, args.workers, args.batch):
+		games += 1
+		plies += game_plies
+		results[result] = results.get(result, 0) + 1
+		if error:
+			errors += 1
+			print(f"game {games}: {error}")
+	elapsed = time.perf_counter() - start
+	print(f"games {games} plies {plies} errors {errors} results {results}")
+	print(f"time {elapsed:.2f}s games/s {games / elapsed if elapsed > 0 else 0:.1f} plies/s {int(plies / elapsed) if elapsed > 0 else 0}")
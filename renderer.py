@@ -0,0 +1,159 @@
+import pygame
+from collections import OrderedDict
+
+from board import PIECE_CODES, NO_PIECE, bitboard_squares
+
+
+# the 12 piece images side by side in PIECE_CODES order, read from disk once per process
+piece_atlas = None
+# square side -> {piece code: image}, cut out of a single smoothscale of the whole atlas
+scaled_pieces = {}
+
+
+def load_atlas():
+	global piece_atlas
+	if piece_atlas is None:
+		images = [pygame.image.load(code + ".png") for code in PIECE_CODES]
+		width, height = images[0].get_size()
+		piece_atlas = pygame.Surface((width * len(images), height), pygame.SRCALPHA)
+		for index, image in enumerate(images):
+			piece_atlas.blit(image, (index * width, 0))
+	return piece_atlas
+
+
+def pieces_for(square_side):
+	if square_side not in scaled_pieces:
+		atlas = pygame.transform.smoothscale(load_atlas(), (square_side * len(PIECE_CODES), square_side))
+		scaled_pieces[square_side] = {code: atlas.subsurface((index * square_side, 0, square_side, square_side))
+									  for index, code in enumerate(PIECE_CODES)}
+	return scaled_pieces[square_side]
+
+
+class Renderer:
+	"""
+	class vẽ bàn cờ và quân cờ lên màn hình pygame, tách khỏi luật cờ (Board) để Board tạo ra được mà không cần pygame
+	thuộc tính:
+		dimension: chiều của bàn cờ
+		square_side: kích thước của 1 ô trong bàn cờ
+		các màu sắc: dùng đê trang trí
+		board_surfaces: ảnh bàn cờ trống (kể cả các ô đích variant.goal, ví dụ 4 ô trung tâm của King of the Hill) vẽ sẵn 1 lần cho mỗi biến thể
+		drawn: (quân cờ, có tô màu không) của từng ô như đang hiện trên màn hình, None khi phải vẽ lại toàn bộ
+		drawn_variant: biến thể của bàn cờ đang hiện trên màn hình
+	phương thức:
+		piece_image: ảnh của 1 quân cờ theo ký hiệu ("wp", "bK", ...) ở cỡ square_side, lấy từ atlas đã thu nhỏ sẵn (pieces_for)
+		resize: đổi kích thước ô khi cửa sổ đổi cỡ, không phải đọc lại ảnh từ đĩa
+		board_surface: ảnh bàn cờ trống của 1 biến thể (Variant)
+		square_rect: hình chữ nhật của 1 ô trên màn hình
+		draw: chỉ vẽ lại những ô đã thay đổi (quân cờ, ô được tô màu) và trả về danh sách vùng cần cập nhật lên màn hình
+		invalidate: bắt vẽ lại toàn bộ bàn cờ ở lần draw sau (khi menu đã vẽ đè lên màn hình)
+		square_at: ô (hàng, cột) tại 1 vị trí chuột, None nếu vị trí đó nằm ngoài bàn cờ
+	"""
+	def __init__(self, square_side=64):
+		self.dimension = 8
+		self.square_side = square_side
+
+		self.LIGHT_BLUE = (66, 191, 245)
+		self.WHITE = (255, 255, 255)
+		self.GREY = (125, 125, 125)
+		self.YELLOW = (247, 244, 143)
+		self.RED = (242, 2, 2)
+		self.BLACK = (0, 0, 0)
+		self.GREEN = (108, 245, 66)
+		self.board_surfaces = {}
+		self.drawn = None
+		self.drawn_variant = None
+
+	def piece_image(self, code):
+		return pieces_for(self.square_side)[code]
+
+	def resize(self, square_side):
+		self.square_side = square_side
+		self.board_surfaces = {}
+		self.invalidate()
+
+	def board_surface(self, variant):
+		if variant not in self.board_surfaces:
+			surface = pygame.Surface((self.dimension * self.square_side, self.dimension * self.square_side))
+			for i in range(self.dimension):
+				for j in range(self.dimension):
+					color = self.LIGHT_BLUE if (i + j) % 2 == 1 else self.WHITE
+					pygame.draw.rect(surface, color, (j * self.square_side, i * self.square_side, self.square_side, self.square_side))
+			# the squares a king wins on, e.g. the four centre squares of King of the Hill
+			for square in bitboard_squares(variant.goal):
+				pygame.draw.rect(surface, self.GREEN, ((square % 8) * self.square_side, (square // 8) * self.square_side, self.square_side, self.square_side))
+			self.board_surfaces[variant] = surface
+		return self.board_surfaces[variant]
+
+	def square_rect(self, square):
+		return pygame.Rect((square % 8) * self.square_side, (square // 8) * self.square_side + 100, self.square_side, self.square_side)
+
+	def draw(self, screen, board, highlights):
+		variant = board.variant
+		background = self.board_surface(variant)
+		full = self.drawn is None or variant != self.drawn_variant
+		if full:
+			self.drawn = [None] * 64
+			self.drawn_variant = variant
+		highlighted = {row * 8 + col for row, col in highlights}
+		dirty = []
+		for square, piece in enumerate(board.squares):
+			state = (piece, square in highlighted)
+			if state == self.drawn[square]:
+				continue
+			self.drawn[square] = state
+			rect = self.square_rect(square)
+			screen.blit(background, rect, rect.move(0, -100))
+			if state[1]:
+				pygame.draw.rect(screen, self.YELLOW, rect)
+			if piece != NO_PIECE:
+				screen.blit(self.piece_image(PIECE_CODES[piece]), rect)
+			dirty.append(rect)
+		if full:
+			return [pygame.Rect(0, 100, background.get_width(), background.get_height())]
+		return dirty
+
+	def invalidate(self):
+		self.drawn = None
+
+	def square_at(self, pos):
+		row, col = (pos[1] - 100) // self.square_side, pos[0] // self.square_side
+		if 0 <= row < self.dimension and 0 <= col < self.dimension:
+			return row, col
+		return None
+
+
+class TextCache:
+	"""
+	class lưu font theo cỡ chữ và các dòng chữ đã vẽ sẵn, để không phải tạo font và vẽ lại chữ mỗi khung hình
+	thuộc tính:
+		fonts: font đã tạo theo cỡ chữ
+		surfaces: ảnh chữ đã vẽ theo (chữ, cỡ, màu), bỏ dòng lâu nhất không dùng khi vượt quá max_size
+		max_size: số ảnh chữ giữ lại tối đa
+	phương thức:
+		font: font của 1 cỡ chữ, chỉ tạo lần đầu
+		render: ảnh của 1 dòng chữ, chỉ vẽ khi chưa có trong bộ nhớ đệm
+	"""
+	def __init__(self, max_size=128):
+		self.fonts = {}
+		self.surfaces = OrderedDict()
+		self.max_size = max_size
+
+	def font(self, size):
+		if size not in self.fonts:
+			self.fonts[size] = pygame.font.Font(None, size)
+		return self.fonts[size]
+
+	def render(self, text, size, color):
+		key = (text, size, color)
+		surface = self.surfaces.get(key)
+		if surface is None:
+			surface = self.font(size).render(text, True, color)
+			self.surfaces[key] = surface
+			if len(self.surfaces) > self.max_size:
+				self.surfaces.popitem(last=False)
+		else:
+			self.surfaces.move_to_end(key)
+		return surface
+
+
+text_cache = TextCache()
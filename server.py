@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+
+from board import Board, KNIGHT, KING, encode_move, move_to_uci
+from variants import VARIANTS
+
+
+def parse_uci(text):
+	# "e2e4" / "e7e8q" -> encode_move value (squares numbered as in board.py, row 0 is rank 8)
+	start = (8 - int(text[1])) * 8 + "abcdefgh".index(text[0])
+	end = (8 - int(text[3])) * 8 + "abcdefgh".index(text[2])
+	promotion = KNIGHT + "nbrq".index(text[4]) if len(text) == 5 else 0
+	return encode_move(start, end, promotion)
+
+
+class GameSession:
+	"""
+	class 1 ván cờ trên máy chủ: 1 Board không giao diện cùng đồng hồ của 2 bên, tính giờ như white_time / black_time trong main()
+	dùng __slots__ để mỗi ván chỉ tốn ít bộ nhớ khi máy chủ giữ hàng nghìn ván cùng lúc
+	thuộc tính:
+		board: thế cờ của ván
+		white_time, black_time: số giây còn lại của mỗi bên
+		last_move_time: thời điểm (time.monotonic) đồng hồ của bên đang đi bắt đầu chạy
+		result: "" khi ván chưa kết thúc, nếu không là lý do kết thúc ("checkmate", "white wins on time", ...)
+	phương thức:
+		update_clock: trừ thời gian đã trôi vào đồng hồ bên đang đi, hết giờ thì kết thúc ván
+		play: kiểm tra và đi 1 nước dạng UCI, trả về thông báo lỗi hoặc None
+		resign: bên đang đi (hoặc bên được chỉ định) xin thua
+		state: trạng thái ván dưới dạng dict để gửi cho người chơi
+	"""
+	__slots__ = ("board", "white_time", "black_time", "last_move_time", "result")
+
+	def __init__(self, time_control=600, fen=None, variant=1):
+		self.board = Board.from_fen(fen, VARIANTS[variant]) if fen else Board(VARIANTS[variant])
+		if not bin(self.board.bitboards[KING]).count("1") == bin(self.board.bitboards[6 + KING]).count("1") == 1:
+			raise ValueError(f"each side needs exactly one king: {fen!r}")
+		self.white_time = time_control
+		self.black_time = time_control
+		self.last_move_time = time.monotonic()
+		# a FEN can start the game already over (mate, stalemate, bare kings, a king on the hill...)
+		self.result = self.board.game_result()
+		self.board.clear_cache()
+
+	def update_clock(self):
+		current_time = time.monotonic()
+		elapsed_time = current_time - self.last_move_time
+		self.last_move_time = current_time
+		if self.result:
+			return
+		if self.board.whiteTurn:
+			self.white_time -= elapsed_time
+			if self.white_time <= 0:
+				self.result = "black wins on time"
+		else:
+			self.black_time -= elapsed_time
+			if self.black_time <= 0:
+				self.result = "white wins on time"
+
+	def play(self, text):
+		self.update_clock()
+		if self.result:
+			return f"game is over: {self.result}"
+		try:
+			move = parse_uci(text)
+		except (ValueError, IndexError):
+			return f"bad move {text!r}"
+		if move not in self.board.legal_moves():
+			return f"illegal move {text!r}"
+		self.board.make_move(move)
+		self.result = self.board.game_result()
+		# the move lists cached by game_result are most of a board's memory; they are cheap to regenerate
+		self.board.clear_cache()
+		return None
+
+	def resign(self, white=None):
+		self.update_clock()
+		if not self.result:
+			white = self.board.whiteTurn if white is None else white
+			self.result = "black wins by resignation" if white else "white wins by resignation"
+
+	def state(self):
+		self.update_clock()
+		return {"fen": self.board.to_fen(), "variant": self.board.variant.number, "result": self.result,
+				"white_time": round(self.white_time, 3), "black_time": round(self.black_time, 3)}
+
+
+class GameServer:
+	"""
+	class máy chủ asyncio giữ nhiều ván cờ cùng lúc, nói chuyện với người chơi bằng từng dòng JSON qua TCP
+	mỗi yêu cầu là 1 dòng {"cmd": ..., ...}, mỗi trả lời là 1 dòng {"ok": true/false, ...}:
+		new (time, fen, variant): tạo ván mới (variant là số của biến thể trong VARIANTS), trả về số ván
+		move (game, move): đi 1 nước dạng UCI ("e2e4", "e7e8q")
+		state (game): thế cờ, kết quả và đồng hồ của ván
+		moves (game): các nước đi hợp lệ
+		resign (game, white): xin thua
+		close (game): bỏ ván khỏi máy chủ
+	thuộc tính:
+		games: các ván đang mở theo số ván
+		game_ids: bộ đếm cấp số ván
+		server: asyncio.Server sau khi start
+	phương thức:
+		start: mở cổng TCP
+		handle_client: đọc và trả lời từng dòng của 1 kết nối
+		handle: xử lý 1 yêu cầu đã giải mã, dùng được trực tiếp không qua mạng
+	"""
+	def __init__(self):
+		self.games = {}
+		self.game_ids = itertools.count(1)
+		self.server = None
+
+	async def start(self, host="127.0.0.1", port=8765):
+		self.server = await asyncio.start_server(self.handle_client, host, port)
+		return self.server
+
+	async def handle_client(self, reader, writer):
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				try:
+					reply = self.handle(json.loads(line))
+				except Exception as error:
+					# whatever a request does wrong, the client gets an error line and keeps its connection
+					reply = {"ok": False, "error": f"bad request: {error!r}"}
+				writer.write(json.dumps(reply).encode() + b"\n")
+				await writer.drain()
+		except ConnectionError:
+			pass
+		finally:
+			writer.close()
+
+	def handle(self, request):
+		command = request["cmd"]
+		if command == "new":
+			# everything is checked and the session built before it gets a game number, so a bad request leaves no game behind
+			time_control = request.get("time", 600)
+			if isinstance(time_control, bool) or not isinstance(time_control, (int, float)) \
+					or not math.isfinite(time_control) or time_control <= 0:
+				return {"ok": False, "error": f"bad time {time_control!r}"}
+			variant = request.get("variant", 1)
+			if not isinstance(variant, int) or isinstance(variant, bool) or variant not in VARIANTS:
+				return {"ok": False, "error": f"no variant {variant!r}"}
+			fen = request.get("fen")
+			if fen is not None and not isinstance(fen, str):
+				return {"ok": False, "error": f"bad fen {fen!r}"}
+			try:
+				session = GameSession(time_control, fen, variant)
+			except ValueError as error:
+				return {"ok": False, "error": f"bad fen: {error}"}
+			game = next(self.game_ids)
+			self.games[game] = session
+			return {"ok": True, "game": game, **session.state()}
+		session = self.games.get(request.get("game"))
+		if session is None:
+			return {"ok": False, "error": f"no game {request.get('game')!r}"}
+		if command == "move":
+			error = session.play(request["move"])
+			if error:
+				return {"ok": False, "error": error}
+			return {"ok": True, **session.state()}
+		if command == "state":
+			return {"ok": True, **session.state()}
+		if command == "moves":
+			return {"ok": True, "moves": [move_to_uci(move) for move in session.board.legal_moves()]}
+		if command == "resign":
+			session.resign(request.get("white"))
+			return {"ok": True, **session.state()}
+		if command == "close":
+			del self.games[request["game"]]
+			return {"ok": True}
+		return {"ok": False, "error": f"unknown command {command!r}"}
+
+
+class Client:
+	"""
+	class người chơi mẫu nói chuyện với GameServer qua TCP, dùng để thử và đo tốc độ máy chủ
+	phương thức:
+		connect: mở kết nối
+		request: gửi 1 yêu cầu và chờ trả lời
+		close: đóng kết nối
+	"""
+	def __init__(self):
+		self.reader = None
+		self.writer = None
+
+	async def connect(self, host="127.0.0.1", port=8765):
+		self.reader, self.writer = await asyncio.open_connection(host, port)
+
+	async def request(self, **message):
+		self.writer.write(json.dumps(message).encode() + b"\n")
+		await self.writer.drain()
+		return json.loads(await self.reader.readline())
+
+	async def close(self):
+		self.writer.close()
+		await self.writer.wait_closed()
+
+
+async def play_random_game(client, plies, rng, latencies):
+	game = (await client.request(cmd="new"))["game"]
+	for ply in range(plies):
+		moves = (await client.request(cmd="moves", game=game))["moves"]
+		if not moves:
+			break
+		start = time.perf_counter()
+		reply = await client.request(cmd="move", game=game, move=rng.choice(moves))
+		latencies.append(time.perf_counter() - start)
+		if not reply["ok"] or reply["result"]:
+			break
+	return game
+
+
+async def benchmark(host, port, games, clients, plies):
+	# plays random games from several client connections at once against a server started in this process
+	server = GameServer()
+	await server.start(host, port)
+	rng = random.Random(1)
+	latencies = []
+
+	async def run_client(count):
+		client = Client()
+		await client.connect(host, port)
+		for game in range(count):
+			await play_random_game(client, plies, rng, latencies)
+		await client.close()
+
+	start = time.perf_counter()
+	await asyncio.gather(*(run_client(games // clients + (index < games % clients)) for index in range(clients)))
+	elapsed = time.perf_counter() - start
+	server.server.close()
+	await server.server.wait_closed()
+	latencies.sort()
+	print(f"games {len(server.games)} moves {len(latencies)} time {elapsed:.2f}s moves/s {int(len(latencies) / elapsed)}")
+	print(f"move round trip mean {sum(latencies) / len(latencies) * 1000:.3f}ms median {latencies[len(latencies) // 2] * 1000:.3f}ms"
+		  f" p99 {latencies[int(len(latencies) * 0.99)] * 1000:.3f}ms")
+	session = next(iter(server.games.values()))
+	validation = time.perf_counter()
+	for repeat in range(1000):
+		session.board.clear_cache()
+		session.board.legal_moves()
+	print(f"move validation (legal move generation) {(time.perf_counter() - validation):.3f}ms per position")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Serve many headless chess games over TCP, one JSON object per line")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8765)
+	parser.add_argument("--bench", type=int, metavar="GAMES", help="instead of serving, play GAMES random games against a local server")
+	parser.add_argument("--clients", type=int, default=50, help="client connections used by --bench")
+	parser.add_argument("--plies", type=int, default=40, help="plies per game played by --bench")
+	args = parser.parse_args()
+
+	if args.bench:
+		asyncio.run(benchmark(args.host, args.port, args.bench, args.clients, args.plies))
+	else:
+		async def serve():
+			server = await GameServer().start(args.host, args.port)
+			async with server:
+				await server.serve_forever()
+		asyncio.run(serve())
@@ -0,0 +1,324 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from board import (Board, NO_PIECE, WHITE, KING, KING_ATTACKS, PAWN_ATTACKS,
+				   bitboard_squares, move_to_uci, rook_attacks, bishop_attacks)
+
+
+# Positions are indexed ((side * 64 + white king) * 64 + extra piece) * 64 + black king, always with white as the side
+# that has the extra piece (side 0: white to move, side 1: black to move); positions with the extra piece on black's
+# side are probed mirrored. A value is 0 for a draw (or an impossible position), otherwise distance to mate in plies + 1:
+# a win for white when white is to move, a loss for black when black is to move.
+POSITIONS = 2 * 64 * 64 * 64
+TABLE_HEADER = struct.Struct("<4ssBxI")
+TABLE_MAGIC = b"RCTB"
+# generated in this order: the pawn table needs the queen and rook tables for promotions
+TABLE_PIECES = "QRP"
+NO_MOVES = 0xFFFF
+
+
+def table_path(directory, letter):
+	return os.path.join(directory, f"k{letter.lower()}k.tb")
+
+
+def piece_attacks(letter, square, occupied):
+	if letter == "Q":
+		return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+	if letter == "R":
+		return rook_attacks(square, occupied)
+	return PAWN_ATTACKS[WHITE][square]
+
+
+def position_index(side, white_king, extra, black_king):
+	return ((side * 64 + white_king) * 64 + extra) * 64 + black_king
+
+
+def is_legal(letter, white_king, extra, black_king, side):
+	if white_king == extra or extra == black_king or white_king == black_king:
+		return False
+	if KING_ATTACKS[white_king] >> black_king & 1:
+		return False
+	if letter == "P" and not 8 <= extra < 56:
+		return False
+	# with white to move black must not already be in check
+	occupied = (1 << white_king) | (1 << extra) | (1 << black_king)
+	return side == 1 or not piece_attacks(letter, extra, occupied) >> black_king & 1
+
+
+def generate_slice(letter, side, white_king, directory):
+	# the moves out of the 4096 positions with this side to move and white king square, run in a pool worker:
+	# degrees (NO_MOVES for impossible positions), successor indices, seeds (index, distance to mate) and escapes
+	# (black can take the extra piece, which draws)
+	promotions = [TableFile(table_path(directory, piece)) for piece in "QR"] if letter == "P" else []
+	degrees = array("H", [NO_MOVES]) * 4096
+	successors = array("I")
+	seeds = []
+	escapes = bytearray(4096)
+	for extra in range(64):
+		for black_king in range(64):
+			if not is_legal(letter, white_king, extra, black_king, side):
+				continue
+			local = extra * 64 + black_king
+			count = len(successors)
+			if side == 0:
+				# white king moves, never next to the black king or onto its own piece
+				for square in bitboard_squares(KING_ATTACKS[white_king] & ~KING_ATTACKS[black_king] & ~(1 << extra)):
+					successors.append(position_index(1, square, extra, black_king))
+				if letter == "P":
+					push = extra - 8
+					if push != white_king and push != black_king:
+						if push < 8:
+							# promotion leaves this table: the best of a new queen or rook decides it
+							best = 0
+							for table in promotions:
+								value = table.value(position_index(1, white_king, push, black_king))
+								if value and (not best or value < best):
+									best = value
+							if best:
+								seeds.append((position_index(0, white_king, extra, black_king), best + 1))
+						else:
+							successors.append(position_index(1, white_king, push, black_king))
+							if extra >= 48 and push - 8 != white_king and push - 8 != black_king:
+								successors.append(position_index(1, white_king, push - 8, black_king))
+				else:
+					occupied = (1 << white_king) | (1 << extra) | (1 << black_king)
+					targets = piece_attacks(letter, extra, occupied) & ~((1 << white_king) | (1 << black_king))
+					for square in bitboard_squares(targets):
+						successors.append(position_index(1, white_king, square, black_king))
+			else:
+				# the black king's own square does not block the extra piece's line behind it
+				guarded = KING_ATTACKS[white_king] | piece_attacks(letter, extra, (1 << white_king) | (1 << extra))
+				for square in bitboard_squares(KING_ATTACKS[black_king] & ~guarded):
+					if square == extra:
+						escapes[local] = 1
+					elif square != white_king:
+						successors.append(position_index(0, white_king, extra, square))
+				occupied = (1 << white_king) | (1 << extra) | (1 << black_king)
+				if len(successors) == count and not escapes[local] and piece_attacks(letter, extra, occupied) >> black_king & 1:
+					seeds.append((position_index(1, white_king, extra, black_king), 1))
+			degrees[local] = len(successors) - count
+	for table in promotions:
+		table.close()
+	return side, white_king, degrees, successors, seeds, escapes
+
+
+def generate_table(letter, directory, pool):
+	slices = pool.map(generate_slice, [letter] * 128, [side for side in (0, 1) for king in range(64)],
+					  [king for side in (0, 1) for king in range(64)], [directory] * 128)
+	# successor lists in index order (compressed sparse rows), then the reverse lists the retrograde pass walks
+	degrees = array("H")
+	successors = array("I")
+	seeds = []
+	escapes = bytearray()
+	for side, white_king, slice_degrees, slice_successors, slice_seeds, slice_escapes in slices:
+		degrees.extend(slice_degrees)
+		successors.extend(slice_successors)
+		seeds.extend(slice_seeds)
+		escapes.extend(slice_escapes)
+	predecessor_counts = array("I", bytes(4 * (POSITIONS + 1)))
+	for successor in successors:
+		predecessor_counts[successor + 1] += 1
+	for index in range(POSITIONS):
+		predecessor_counts[index + 1] += predecessor_counts[index]
+	starts = array("I", predecessor_counts)
+	predecessors = array("I", bytes(4 * len(successors)))
+	position = 0
+	for index in range(POSITIONS):
+		degree = degrees[index]
+		if degree == NO_MOVES:
+			continue
+		for successor in successors[position:position + degree]:
+			predecessors[starts[successor]] = index
+			starts[successor] += 1
+		position += degree
+
+	# values are settled in order of distance: a white position wins as soon as one of its moves reaches a lost black
+	# position, a black position loses once every one of its moves reaches a won white position (the last one settled
+	# is the longest defence), unless it can take the extra piece
+	values = bytearray(POSITIONS)
+	remaining = array("H", degrees)
+	buckets = {}
+	for index, value in seeds:
+		buckets.setdefault(value, []).append(index)
+	half = POSITIONS // 2
+	value = 1
+	while buckets:
+		for index in buckets.pop(value, []):
+			if values[index]:
+				continue
+			values[index] = value
+			for predecessor in predecessors[predecessor_counts[index]:predecessor_counts[index + 1]]:
+				if predecessor < half:
+					if not values[predecessor]:
+						buckets.setdefault(value + 1, []).append(predecessor)
+				else:
+					remaining[predecessor] -= 1
+					if not remaining[predecessor] and not escapes[predecessor]:
+						buckets.setdefault(value + 1, []).append(predecessor)
+		value += 1
+	return values
+
+
+def pack_values(values, bits):
+	# value i takes bits i * bits .. i * bits + bits - 1 of a little-endian bit stream
+	packed = bytearray((len(values) * bits + 7) // 8 + 2)
+	accumulator = 0
+	filled = 0
+	position = 0
+	for value in values:
+		accumulator |= value << filled
+		filled += bits
+		while filled >= 8:
+			packed[position] = accumulator & 0xFF
+			accumulator >>= 8
+			filled -= 8
+			position += 1
+	if filled:
+		packed[position] = accumulator
+	return packed
+
+
+def write_table(path, letter, values):
+	bits = max(values).bit_length()
+	with open(path, "wb") as table:
+		table.write(TABLE_HEADER.pack(TABLE_MAGIC, letter.encode(), bits, len(values)))
+		table.write(pack_values(values, bits))
+
+
+class TableFile:
+	"""
+	class 1 bảng tàn cuộc trên đĩa (vua + 1 quân trắng với vua đen) đọc qua mmap, giá trị nén mỗi thế cờ bits bit
+	thuộc tính:
+		data: vùng mmap của tệp
+		letter: quân thêm của bảng (Q, R, P)
+		bits: số bit của mỗi giá trị
+	phương thức:
+		value: giá trị (0 hoà, nếu không là số nước tới chiếu hết + 1) của 1 thế cờ theo chỉ số position_index
+		close: đóng tệp
+	"""
+	def __init__(self, path):
+		self.file = open(path, "rb")
+		self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, letter, self.bits, count = TABLE_HEADER.unpack_from(self.data)
+		if magic != TABLE_MAGIC or count != POSITIONS:
+			raise ValueError(f"{path} is not a tablebase file")
+		self.letter = letter.decode()
+		self.mask = (1 << self.bits) - 1
+
+	def value(self, index):
+		bit = index * self.bits
+		start = TABLE_HEADER.size + (bit >> 3)
+		return int.from_bytes(self.data[start:start + 3], "little") >> (bit & 7) & self.mask
+
+	def close(self):
+		self.data.close()
+		self.file.close()
+
+
+class Tablebase:
+	"""
+	class tra bảng tàn cuộc cho Board: các thế cờ chỉ còn 2 vua và 1 hậu, xe hoặc tốt được chơi hoàn hảo không cần tìm
+	thuộc tính:
+		tables: các TableFile đã mở theo quân thêm
+	phương thức:
+		probe: (thắng 1 / hoà 0 / thua -1 với bên đang đi, số nước tới chiếu hết) hoặc None nếu thế cờ không có trong bảng
+		best_move: nước đi tốt nhất theo bảng (thắng nhanh nhất, thua chậm nhất), 0 nếu thế cờ không có trong bảng
+		close: đóng các bảng
+	"""
+	def __init__(self, directory):
+		self.tables = {}
+		for letter in TABLE_PIECES:
+			if os.path.exists(table_path(directory, letter)):
+				self.tables[letter] = TableFile(table_path(directory, letter))
+
+	def probe(self, board):
+		occupied = board.occupancy[0] | board.occupancy[1]
+		count = bin(occupied).count("1")
+		if count == 2:
+			return 0, 0
+		if count != 3:
+			return None
+		kings = {}
+		extra = NO_PIECE
+		extra_square = 0
+		for square in bitboard_squares(occupied):
+			piece = board.squares[square]
+			if piece % 6 == KING:
+				kings[piece // 6] = square
+			else:
+				extra, extra_square = piece, square
+		table = self.tables.get("PNBRQK"[extra % 6])
+		if table is None:
+			return None
+		if extra < 6:
+			side = 0 if board.whiteTurn else 1
+			value = table.value(position_index(side, kings[0], extra_square, kings[1]))
+		else:
+			# black has the extra piece: look it up with the board flipped and the colours swapped
+			side = 1 if board.whiteTurn else 0
+			value = table.value(position_index(side, kings[1] ^ 56, extra_square ^ 56, kings[0] ^ 56))
+		if not value:
+			return 0, 0
+		return (1 if side == 0 else -1), value - 1
+
+	def best_move(self, board):
+		if self.probe(board) is None:
+			return 0
+		best_move, best_key = 0, None
+		for move in board.legal_moves():
+			board.make_move(move)
+			result = self.probe(board)
+			board.unmake_move()
+			if result is None:
+				continue
+			wdl, distance = result
+			# from the mover's side: the opponent losing fastest first, then draws, then the opponent winning slowest
+			key = (wdl, distance if wdl < 0 else -distance)
+			if best_key is None or key < best_key:
+				best_move, best_key = move, key
+		return best_move
+
+	def close(self):
+		for table in self.tables.values():
+			table.close()
+
+
+def generate(directory, workers=None):
+	os.makedirs(directory, exist_ok=True)
+	with ProcessPoolExecutor(workers) as pool:
+		for letter in TABLE_PIECES:
+			start = time.perf_counter()
+			values = generate_table(letter, directory, pool)
+			write_table(table_path(directory, letter), letter, values)
+			wins = sum(1 for value in values[:POSITIONS // 2] if value)
+			print(f"k{letter.lower()}k: {wins} won positions with white to move, longest mate {max(values) - 1} plies,"
+				  f" {os.path.getsize(table_path(directory, letter))} bytes, {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Generate or probe the KQK, KRK and KPK endgame tables")
+	parser.add_argument("directory", help="directory holding the .tb files")
+	parser.add_argument("--generate", action="store_true", help="generate the tables into the directory")
+	parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes used for generation")
+	parser.add_argument("--fen", help="probe this position")
+	args = parser.parse_args()
+
+	if args.generate:
+		generate(args.directory, args.workers)
+	if args.fen:
+		tablebase = Tablebase(args.directory)
+		board = Board.from_fen(args.fen)
+		start = time.perf_counter()
+		for repeat in range(10000):
+			result = tablebase.probe(board)
+		probe_time = (time.perf_counter() - start) / 10000
+		print(f"probe {result} in {probe_time * 1e6:.1f}us")
+		move = tablebase.best_move(board)
+		if move:
+			print(f"best move {move_to_uci(move)}")
+		tablebase.close()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from board import Board, DRAW_RESULTS, move_to_uci
+from engine import Engine, MAX_PLY
+from epd import read_epd
+from variants import VARIANTS, CHESS960, chess960_fen
+
+
+# a few balanced positions after the first moves of common openings, used when no suite file is given
+DEFAULT_OPENINGS = [
+	"rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+	"rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2",
+	"rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+	"rnbqkbnr/pppp1ppp/4p3/8/3PP3/8/PPP2PPP/RNBQKBNR b KQkq d3 0 2",
+	"rnbqkb1r/pppppppp/5n2/8/2PP4/8/PP2PPPP/RNBQKBNR b KQkq c3 0 2",
+	"rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq c3 0 2",
+	"rnbqkbnr/pp1ppppp/2p5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+	"rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq c3 0 1",
+]
+
+
+def parse_player(text):
+	# "hash=16,depth=6" -> Engine settings; anything left out keeps the engine's default
+	# used as an argparse type, so a bad item is reported like any other bad option
+	settings = {"hash_mb": 16, "max_depth": MAX_PLY}
+	names = {"hash": "hash_mb", "depth": "max_depth"}
+	for item in filter(None, text.split(",")):
+		name, value = item.partition("=")[::2]
+		if name not in names:
+			raise argparse.ArgumentTypeError(f"unknown player setting {name!r} (use hash and depth)")
+		if not value.isdigit() or not int(value):
+			raise argparse.ArgumentTypeError(f"{name} needs a positive whole number: {item!r}")
+		settings[names[name]] = int(value)
+	return settings
+
+
+def play_game(white, black, fen, variant, base_time, increment, max_plies):
+	# one engine-vs-engine game; returns the result from white's point of view ("1-0", "0-1", "1/2-1/2") and how it ended
+	board = Board.from_fen(fen, VARIANTS[variant])
+	engines = [Engine(white["hash_mb"]), Engine(black["hash_mb"])]
+	settings = [white, black]
+	clocks = [base_time, base_time]
+	moves = []
+	result, reason = "1/2-1/2", "max plies"
+	for ply in range(max_plies):
+		if board.game_result():
+			# checkmate or a variant's own win (king of the hill, three checks) is a loss for the side to move
+			if board.game_result() in DRAW_RESULTS:
+				result = "1/2-1/2"
+			else:
+				result = "0-1" if board.whiteTurn else "1-0"
+			reason = board.game_result()
+			break
+		side = 0 if board.whiteTurn else 1
+		engine = engines[side]
+		start = time.perf_counter()
+		move = engine.search(board, engine.allot_time(clocks[side], increment), settings[side]["max_depth"])
+		clocks[side] -= time.perf_counter() - start
+		if clocks[side] <= 0:
+			result, reason = ("0-1" if side == 0 else "1-0"), "time"
+			break
+		clocks[side] += increment
+		board.make_move(move)
+		moves.append(move_to_uci(move))
+	return {"fen": fen, "variant": variant, "result": result, "reason": reason, "plies": len(moves), "moves": " ".join(moves)}
+
+
+def expected_score(elo):
+	return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score):
+	score = min(max(score, 1e-6), 1 - 1e-6)
+	return -400 * math.log10(1 / score - 1)
+
+
+class MatchStats:
+	"""
+	class thống kê kết quả của người chơi A khi đấu với B
+	thuộc tính:
+		wins, draws, losses: số ván thắng, hoà, thua của A
+	phương thức:
+		add: thêm kết quả 1 ván (điểm của A: 1, 0.5, 0)
+		score: điểm trung bình của A
+		elo: chênh lệch Elo ước lượng và khoảng sai số 95%
+		llr: log likelihood ratio của SPRT giữa giả thuyết elo0 và elo1 (xấp xỉ chuẩn theo 3 kết quả thắng/hoà/thua)
+	"""
+	def __init__(self):
+		self.wins = 0
+		self.draws = 0
+		self.losses = 0
+
+	def games(self):
+		return self.wins + self.draws + self.losses
+
+	def add(self, score):
+		if score == 1:
+			self.wins += 1
+		elif score == 0:
+			self.losses += 1
+		else:
+			self.draws += 1
+
+	def score(self):
+		return (self.wins + 0.5 * self.draws) / self.games()
+
+	def variance(self):
+		score = self.score()
+		games = self.games()
+		return (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / games
+
+	def elo(self):
+		score = self.score()
+		margin = 1.96 * math.sqrt(self.variance() / self.games())
+		return elo_from_score(score), elo_from_score(score - margin), elo_from_score(score + margin)
+
+	def llr(self, elo0, elo1):
+		variance = self.variance()
+		if not variance:
+			return 0.0
+		score0, score1 = expected_score(elo0), expected_score(elo1)
+		return self.games() * (score1 - score0) * (2 * self.score() - score0 - score1) / (2 * variance)
+
+
+def schedule(openings, games):
+	# every opening is played twice with the colours swapped, so neither player keeps the better side of it
+	for index in range(games):
+		yield openings[(index // 2) % len(openings)], index % 2 == 1
+
+
+def run_tournament(player_a, player_b, openings, games, variant, base_time, increment, max_plies,
+				   workers, output, sprt=None):
+	stats = MatchStats()
+	lower = upper = None
+	if sprt:
+		elo0, elo1, alpha, beta = sprt
+		lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+	start = time.perf_counter()
+	games_iter = schedule(openings, games)
+	with ProcessPoolExecutor(workers) as pool, open(output, "a") as results:
+		pending = {}
+
+		def submit():
+			for fen, a_is_black in games_iter:
+				white, black = (player_b, player_a) if a_is_black else (player_a, player_b)
+				pending[pool.submit(play_game, white, black, fen, variant, base_time, increment, max_plies)] = a_is_black
+				return True
+			return False
+
+		# a couple of games per worker in flight: results stream out as they finish and an SPRT stop wastes little
+		for slot in range(2 * workers):
+			if not submit():
+				break
+		while pending:
+			done, waiting = wait(pending, return_when=FIRST_COMPLETED)
+			for future in done:
+				a_is_black = pending.pop(future)
+				game = future.result()
+				score = {"1-0": 1, "0-1": 0}.get(game["result"], 0.5)
+				game["a_score"] = 1 - score if a_is_black else score
+				stats.add(game["a_score"])
+				results.write(json.dumps(game) + "\n")
+				results.flush()
+
+				elapsed = time.perf_counter() - start
+				elo, elo_low, elo_high = stats.elo()
+				line = (f"games {stats.games()} +{stats.wins} ={stats.draws} -{stats.losses} elo {elo:+.1f} [{elo_low:+.1f}, {elo_high:+.1f}]"
+						f" games/min {stats.games() * 60 / elapsed:.1f}")
+				if sprt:
+					llr = stats.llr(elo0, elo1)
+					line += f" llr {llr:.2f} ({lower:.2f}, {upper:.2f})"
+				print(line)
+				if sprt and not lower < llr < upper:
+					print(f"SPRT: {'H1 accepted' if llr >= upper else 'H0 accepted'}")
+					for other in pending:
+						other.cancel()
+					return stats
+				submit()
+	return stats
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Play engine-vs-engine matches headless over a process pool")
+	parser.add_argument("--a", type=parse_player, default="", help="player A settings, e.g. hash=16,depth=6")
+	parser.add_argument("--b", type=parse_player, default="", help="player B settings")
+	parser.add_argument("--games", type=int, default=100)
+	parser.add_argument("--variant", type=int, choices=sorted(VARIANTS), default=1,
+						help="1 normal game, 2 King of the Hill, 4 Three-Check, 5 Chess960 (as the main menu choice)")
+	parser.add_argument("--time", type=float, default=10.0, help="base time per side in seconds")
+	parser.add_argument("--inc", type=float, default=0.1, help="increment per move in seconds")
+	parser.add_argument("--max-plies", type=int, default=300, help="adjudicate a draw after this many plies")
+	parser.add_argument("--openings", help="EPD or FEN file with one opening position per line")
+	parser.add_argument("--workers", type=int, default=os.cpu_count())
+	parser.add_argument("--output", default="tournament.jsonl", help="results are appended here, one JSON object per game")
+	parser.add_argument("--sprt", nargs=4, type=float, metavar=("ELO0", "ELO1", "ALPHA", "BETA"),
+						help="stop early once the SPRT accepts H0 (A is elo0 stronger) or H1 (elo1 stronger)")
+	args = parser.parse_args()
+
+	if args.openings:
+		openings = [fen for fen, operations in read_epd(args.openings)]
+	elif args.variant == CHESS960.number:
+		# a fixed sample of the 960 start positions, so that reruns play the same games
+		openings = [chess960_fen(index) for index in random.Random(960).sample(range(960), 50)]
+	else:
+		openings = DEFAULT_OPENINGS
+	run_tournament(args.a, args.b, openings, args.games, args.variant, args.time, args.inc,
+				   args.max_plies, args.workers, args.output, args.sprt)
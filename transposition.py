@@ -0,0 +1,96 @@
+from array import array
+
+
+EMPTY, EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2, 3
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2
+SCORE_OFFSET = 1 << 31
+
+
+def table_words(size_mb):
+	# number of 64-bit words (keys and data) the largest power-of-two table within size_mb needs
+	bucket_count = 1
+	while bucket_count * 2 * SLOTS_PER_BUCKET * ENTRY_BYTES <= size_mb * 1024 * 1024:
+		bucket_count *= 2
+	return 2 * SLOTS_PER_BUCKET * bucket_count
+
+
+class TranspositionTable:
+	"""
+	class bảng chuyển vị: ghi nhớ kết quả tìm kiếm của từng thế cờ theo khoá Zobrist (Board.hash)
+	mỗi bucket có 2 ô: ô 0 ưu tiên giữ kết quả tìm sâu hơn, ô 1 luôn bị ghi đè bằng kết quả mới nhất
+	bảng có thể nằm trên 1 vùng nhớ dùng chung (buffer) để nhiều tiến trình cùng đọc ghi không cần khoá:
+	keys lưu khoá XOR data, nên 1 ô bị 2 tiến trình ghi xen kẽ sẽ không khớp khoá và bị bỏ qua
+	thuộc tính:
+		bucket_count: số bucket (luỹ thừa của 2, vừa với dung lượng size_mb)
+		keys, data: 2 mảng số 64 bit cấp phát sẵn (hoặc nằm trên buffer); data gói nước đi (16 bit), độ sâu (8 bit), loại cận (2 bit), lượt tìm (6 bit) và điểm (32 bit)
+		generation: số thứ tự lần tìm kiếm, kết quả của lần tìm cũ luôn được phép ghi đè
+		hits, misses, collisions, stores: bộ đếm thống kê
+	phương thức:
+		probe: tra 1 thế cờ, trả về (nước đi, độ sâu, loại cận, điểm) hoặc None
+		store: ghi kết quả tìm kiếm của 1 thế cờ theo chính sách thay thế ở trên
+		new_search: tăng generation trước mỗi lần tìm
+		clear: xoá toàn bộ bảng và bộ đếm
+		hit_rate: tỉ lệ tra trúng
+	"""
+	def __init__(self, size_mb=16, buffer=None):
+		words = table_words(size_mb)
+		self.bucket_count = words // (2 * SLOTS_PER_BUCKET)
+		self.mask = self.bucket_count - 1
+		if buffer is None:
+			self.keys = array("Q", bytes(4 * words))
+			self.data = array("Q", bytes(4 * words))
+		else:
+			view = memoryview(buffer).cast("B").cast("Q")
+			self.keys = view[:words // 2]
+			self.data = view[words // 2:words]
+		self.generation = 0
+		self.hits = 0
+		self.misses = 0
+		self.collisions = 0
+		self.stores = 0
+
+	def probe(self, key):
+		index = (key & self.mask) * SLOTS_PER_BUCKET
+		keys = self.keys
+		for slot in (index, index + 1):
+			data = self.data[slot]
+			if keys[slot] ^ data == key:
+				if data >> 24 & 3:
+					self.hits += 1
+					return data & 0xFFFF, data >> 16 & 0xFF, data >> 24 & 3, (data >> 32) - SCORE_OFFSET
+		self.misses += 1
+		return None
+
+	def store(self, key, depth, bound, score, move):
+		index = (key & self.mask) * SLOTS_PER_BUCKET
+		keys = self.keys
+		data = self.data
+		old = data[index]
+		same = keys[index] ^ old == key
+		if same or not old >> 24 & 3 or (old >> 16 & 0xFF) <= depth or old >> 26 & 63 != self.generation:
+			slot = index
+			# a shallower result must not wipe out the best move already known for this position
+			if not move and same:
+				move = old & 0xFFFF
+		else:
+			slot = index + 1
+		if data[slot] >> 24 & 3 and keys[slot] ^ data[slot] != key:
+			self.collisions += 1
+		self.stores += 1
+		entry = move | (min(depth, 255) << 16) | (bound << 24) | (self.generation << 26) | ((score + SCORE_OFFSET) << 32)
+		data[slot] = entry
+		keys[slot] = key ^ entry
+
+	def new_search(self):
+		self.generation = (self.generation + 1) & 63
+
+	def clear(self):
+		zeros = array("Q", bytes(len(self.keys) * 8))
+		self.keys[:] = zeros
+		self.data[:] = zeros
+		self.hits = self.misses = self.collisions = self.stores = 0
+
+	def hit_rate(self):
+		probes = self.hits + self.misses
+		return self.hits / probes if probes else 0.0
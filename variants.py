@@ -0,0 +1,125 @@
+import random
+
+from board import Variant, STANDARD, WHITE, BLACK, KING
+
+
+# King of the Hill: d5, e5, d4, e4 (squares numbered as in board.py, row 0 is rank 8)
+HILL_SQUARES = (27, 28, 35, 36)
+HILL = sum(1 << square for square in HILL_SQUARES)
+# king steps from every square to the nearest hill square, and what being that close is worth to the engine
+HILL_DISTANCE = tuple(min(max(abs(square // 8 - hill // 8), abs(square % 8 - hill % 8)) for hill in HILL_SQUARES)
+					  for square in range(64))
+HILL_BONUS = (0, 120, 50, 15)
+# Three-Check: what the checks already given are worth to the engine (the third one ends the game)
+CHECK_BONUS = (0, 100, 300, 0)
+# Chess960: the 10 ways to put both knights on the 5 files left after the bishops and the queen, in Scharnagl order
+KNIGHT_PLACEMENTS = ((0, 1), (0, 2), (0, 3), (0, 4), (1, 2), (1, 3), (1, 4), (2, 3), (2, 4), (3, 4))
+
+
+def chess960_fen(index):
+	# start position number index (0-959, 518 is the normal start) of Scharnagl's numbering
+	back = [None] * 8
+	index, light = divmod(index, 4)
+	back[2 * light + 1] = "B"
+	index, dark = divmod(index, 4)
+	back[2 * dark] = "B"
+	index, queen = divmod(index, 6)
+	back[[file for file in range(8) if back[file] is None][queen]] = "Q"
+	empty = [file for file in range(8) if back[file] is None]
+	for knight in KNIGHT_PLACEMENTS[index]:
+		back[empty[knight]] = "N"
+	for file, piece in zip([file for file in range(8) if back[file] is None], "RKR"):
+		back[file] = piece
+	back = "".join(back)
+	# KQkq names the outermost rooks (X-FEN), which are the only two rooks at the start
+	return f"{back.lower()}/pppppppp/8/8/8/8/PPPPPPPP/{back} w KQkq - 0 1"
+
+
+def chess960_index(fen):
+	# the other way round: the number of the start position whose white back rank the fen has (ValueError if none)
+	back = fen.split(" ")[0].split("/")[-1]
+	if len(back) != 8 or sorted(back) != sorted("RNBQKBNR") or not back.index("R") < back.index("K") < back.rindex("R"):
+		raise ValueError(f"not a Chess960 start rank: {back}")
+	light, dark = sorted((file for file in range(8) if back[file] == "B"), key=lambda file: -(file % 2))
+	if light % 2 == 0 or dark % 2:
+		raise ValueError(f"not a Chess960 start rank: {back}")
+	rest = [piece for piece in back if piece != "B"]
+	queen = rest.index("Q")
+	del rest[queen]
+	knights = tuple(file for file in range(5) if rest[file] == "N")
+	return ((KNIGHT_PLACEMENTS.index(knights) * 6 + queen) * 4 + dark // 2) * 4 + light // 2
+
+
+class KingOfTheHill(Variant):
+	"""
+	class biến thể King of the Hill: vua của bên nào bước vào 1 trong 4 ô trung tâm (HILL) thì bên đó thắng
+	phương thức:
+		result: "king of the hill" nếu vua của bên vừa đi đang đứng trên HILL
+		evaluate: thưởng cho vua càng gần HILL
+	"""
+	__slots__ = ()
+	number = 2
+	name = "King of the Hill"
+	goal = HILL
+	# a bare king can still walk to the hill
+	material_draws = False
+	tablebases = False
+	# the hill changes what is good from the first move, and the key does not tell the variants apart
+	opening_book = False
+
+	def result(self, board):
+		mover = BLACK if board.whiteTurn else WHITE
+		return "king of the hill" if board.bitboards[mover * 6 + KING] & HILL else ""
+
+	def evaluate(self, board):
+		bitboards = board.bitboards
+		return (HILL_BONUS[HILL_DISTANCE[bitboards[KING].bit_length() - 1]]
+				- HILL_BONUS[HILL_DISTANCE[bitboards[6 + KING].bit_length() - 1]])
+
+
+class ThreeCheck(Variant):
+	"""
+	class biến thể Three-Check: bên nào chiếu đối thủ đủ 3 lần thì thắng (Board đếm số lần chiếu trong checks)
+	phương thức:
+		result: "three checks" nếu bên vừa đi đã chiếu đủ check_limit lần
+		evaluate: thưởng theo số lần đã chiếu
+	"""
+	__slots__ = ()
+	number = 4
+	name = "Three-Check"
+	check_limit = 3
+	material_draws = False
+	tablebases = False
+	# with no checks given the key is the normal game's, but a normal book does not play for checks
+	opening_book = False
+
+	def result(self, board):
+		return "three checks" if board.checks[BLACK if board.whiteTurn else WHITE] >= self.check_limit else ""
+
+	def evaluate(self, board):
+		return CHECK_BONUS[board.checks[WHITE]] - CHECK_BONUS[board.checks[BLACK]]
+
+
+class Chess960(Variant):
+	"""
+	class biến thể Chess960: hàng quân sau được xếp ngẫu nhiên theo 1 trong 960 thế cờ ban đầu, luật đi như cờ thường
+	nhập thành đưa vua về cột g / c và xe về cột f / d từ bất kỳ ô ban đầu nào (Board.castling_homes), nước nhập thành
+	được viết là vua ăn xe của mình, trừ khi vua ở e và xe ở a / h như cờ thường
+	phương thức:
+		start_fen: 1 thế cờ ban đầu ngẫu nhiên (chess960_fen)
+	"""
+	__slots__ = ()
+	number = 5
+	name = "Chess960"
+	# the normal start (number 518) has the normal game's key, every other start is missing from the book anyway
+	opening_book = False
+
+	def start_fen(self):
+		return chess960_fen(random.randrange(960))
+
+
+KING_OF_THE_HILL = KingOfTheHill()
+THREE_CHECK = ThreeCheck()
+CHESS960 = Chess960()
+# variant number (main menu choice, game record field) -> variant; 3 is the main menu's normal game against the computer
+VARIANTS = {variant.number: variant for variant in (STANDARD, KING_OF_THE_HILL, THREE_CHECK, CHESS960)}